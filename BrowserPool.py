@@ -0,0 +1,311 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field, replace
+from urllib.parse import urlparse
+
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))  # Number of warm Chromium instances
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))  # Pages served before a browser is recycled
+BROWSER_JOB_TIMEOUT = float(os.getenv("BROWSER_JOB_TIMEOUT", "120"))  # Seconds a caller waits for its page
+
+
+class BrowserPool:
+    """
+    Keeps a few long-lived headless Chromium instances and hands out a fresh, isolated
+    browser context to every job. The Playwright sync API is bound to the thread that
+    started it, so each browser lives in its own worker thread and jobs are sent to the
+    workers through a queue.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self._jobs = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.size:
+                worker = threading.Thread(target=self._worker_loop, name=f"browser-pool-{len(self._workers)}",
+                                          daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _launch(self, playwright):
+        browser = playwright.chromium.launch(headless=True)
+        print(f"[INFO] Browser pool: launched Chromium {browser.version}")
+        return browser
+
+    @staticmethod
+    def _is_healthy(browser):
+        try:
+            return browser is not None and browser.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(browser):
+        try:
+            if browser is not None:
+                browser.close()
+        except Exception as e:
+            print(f"[WARN] Browser pool: could not close the browser: {e}")
+
+    def _worker_loop(self):
+        playwright_manager = None
+        playwright = None
+        browser = None
+        pages_served = 0
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                fn, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                # Started with the first job and retried with the next one if it fails, so a worker
+                # that cannot start Playwright only fails the jobs it took itself
+                if playwright is None:
+                    try:
+                        playwright_manager = sync_playwright()
+                        playwright = playwright_manager.start()
+                    except Exception as e:
+                        print(f"[ERROR] Browser pool: could not start Playwright: {e}")
+                        playwright_manager = None
+                        future.set_exception(e)
+                        continue
+
+                if pages_served >= self.max_pages or not self._is_healthy(browser):
+                    self._close(browser)
+                    browser = None
+                    pages_served = 0
+                    try:
+                        browser = self._launch(playwright)
+                    except Exception as e:
+                        future.set_exception(e)
+                        continue
+
+                context = None
+                try:
+                    context = browser.new_context()
+                    page = context.new_page()
+                    future.set_result(fn(page))
+                except Exception as e:
+                    future.set_exception(e)
+                finally:
+                    pages_served += 1
+                    try:
+                        if context is not None:
+                            context.close()
+                    except Exception:
+                        # A context that cannot be closed usually means a crashed browser
+                        self._close(browser)
+                        browser = None
+        finally:
+            self._close(browser)
+            if playwright_manager is not None:
+                playwright_manager.__exit__(None, None, None)
+
+    def run(self, fn, timeout=BROWSER_JOB_TIMEOUT):
+        """
+        Runs `fn(page)` on a new page in an isolated context and returns its result.
+        `fn` executes on a pool thread, so it must do all of its Playwright work itself.
+        """
+        self._ensure_workers()
+        future = Future()
+        self._jobs.put((fn, future))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # A job still in the queue is skipped by the worker instead of loading a page nobody waits for
+            future.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        for _ in workers:
+            self._jobs.put(None)
+        for worker in workers:
+            worker.join(timeout=10)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+                atexit.register(_pool.close)
+    return _pool
+
+
+HEAVY_RESOURCE_TYPES = {"image", "media", "font"}
+THIRD_PARTY_RESOURCE_TYPES = {"script", "xhr", "fetch", "eventsource", "websocket", "manifest", "texttrack", "other"}
+
+# Analytics, ads and consent hosts: never needed to render a news listing. Subdomains match too.
+TRACKER_HOSTS = {
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "googlesyndication.com",
+    "doubleclick.net", "adservice.google.com", "connect.facebook.net", "analytics.tiktok.com", "bat.bing.com",
+    "snap.licdn.com", "px.ads.linkedin.com", "clarity.ms", "hotjar.com", "mixpanel.com", "segment.io",
+    "cdn.segment.com", "scorecardresearch.com", "quantserve.com", "taboola.com", "outbrain.com", "criteo.com",
+    "criteo.net", "hs-analytics.net", "hs-scripts.com", "cookielaw.org", "onetrust.com", "cookiebot.com",
+    "nr-data.net", "js-agent.newrelic.com",
+} | {host.strip().lower() for host in os.getenv("BROWSER_BLOCKED_HOSTS", "").split(",") if host.strip()}
+
+
+@dataclass
+class LoadProfile:
+    blocked_types: set = field(default_factory=lambda: set(HEAVY_RESOURCE_TYPES))
+    blocked_hosts: set = field(default_factory=lambda: set(TRACKER_HOSTS))
+    # Abort THIRD_PARTY_RESOURCE_TYPES requests to other sites. Off by default: JS-rendered listings
+    # often load their bundle or data from a CDN or a CMS API on another domain.
+    block_third_party: bool = False
+    ready_selector: str = ""  # If set, the page is ready once this selector appears
+    ready_timeout: int = 3000  # Upper bound in ms for the readiness wait
+    goto_timeout: int = 30000
+
+
+DEFAULT_LOAD_PROFILE = LoadProfile()
+
+# Per-domain overrides, e.g. sites whose listing is rendered by a third-party widget
+LOAD_PROFILES = {}
+
+PAGE_TIMINGS_REPORTED = 20  # Most recent page loads listed by get_page_stats()
+
+_page_timings = deque(maxlen=PAGE_TIMINGS_REPORTED)
+_page_totals = {"pages": 0, "requests": 0, "blocked": 0, "total_ms": 0}
+_ready_signals = {"selector": 0, "networkidle": 0, "timeout": 0}
+_page_timings_lock = threading.Lock()
+
+
+def register_load_profile(domain, **overrides):
+    for name in ("blocked_types", "blocked_hosts"):
+        if name in overrides:
+            overrides[name] = set(overrides[name])
+    LOAD_PROFILES[domain.lower()] = replace(DEFAULT_LOAD_PROFILE, **overrides)
+
+
+def _register_profiles_from_env():
+    # BROWSER_LOAD_PROFILES='{"example.com": {"block_third_party": true, "ready_selector": ".news-list"}}'
+    raw = os.getenv("BROWSER_LOAD_PROFILES", "")
+    if not raw:
+        return
+    try:
+        for domain, overrides in json.loads(raw).items():
+            register_load_profile(domain, **overrides)
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"[WARN] Invalid BROWSER_LOAD_PROFILES, using the default profile: {e}")
+
+
+_register_profiles_from_env()
+
+
+def _is_blocked_host(host, blocked_hosts):
+    labels = host.split(".")
+    return any(".".join(labels[i:]) in blocked_hosts for i in range(len(labels)))
+
+
+def get_load_profile(url):
+    host = urlparse(url).netloc.lower()
+    while host:
+        if host in LOAD_PROFILES:
+            return LOAD_PROFILES[host]
+        host = host.partition(".")[2]
+    return DEFAULT_LOAD_PROFILE
+
+
+def _site_of(host):
+    # Rough registrable domain: the last two labels, three for e.g. "co.uk"-style suffixes
+    labels = host.lower().split(".")
+    if len(labels) >= 3 and len(labels[-2]) <= 3 and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def load_page(page, url, profile=None):
+    """
+    Opens `url` with resource blocking and event-driven readiness instead of a fixed sleep.
+    Returns the timings of the load, which are also reported by get_page_stats().
+    """
+    profile = profile or get_load_profile(url)
+    site = _site_of(urlparse(url).netloc)
+    counters = {"requests": 0, "blocked": 0}
+
+    def route_request(route):
+        request = route.request
+        counters["requests"] += 1
+        resource_type = request.resource_type
+        host = (urlparse(request.url).hostname or "").lower()
+        third_party = _site_of(host) != site
+        if resource_type in profile.blocked_types or _is_blocked_host(host, profile.blocked_hosts) or (
+                profile.block_third_party and third_party and resource_type in THIRD_PARTY_RESOURCE_TYPES):
+            counters["blocked"] += 1
+            return route.abort()
+        return route.continue_()
+
+    page.route("**/*", route_request)
+
+    started = time.perf_counter()
+    page.goto(url, wait_until="domcontentloaded", timeout=profile.goto_timeout)
+    dom_ready = time.perf_counter()
+
+    ready_signal = "selector" if profile.ready_selector else "networkidle"
+    try:
+        if profile.ready_selector:
+            page.wait_for_selector(profile.ready_selector, timeout=profile.ready_timeout)
+        else:
+            page.wait_for_load_state("networkidle", timeout=profile.ready_timeout)
+    except PlaywrightTimeoutError:
+        ready_signal = "timeout"
+    finished = time.perf_counter()
+
+    timings = {
+        "url": url,
+        "dom_ms": round((dom_ready - started) * 1000),
+        "ready_ms": round((finished - dom_ready) * 1000),
+        "total_ms": round((finished - started) * 1000),
+        "ready_signal": ready_signal,
+        "requests": counters["requests"],
+        "blocked": counters["blocked"],
+    }
+    with _page_timings_lock:
+        _page_timings.append(timings)
+        _page_totals["pages"] += 1
+        _page_totals["requests"] += counters["requests"]
+        _page_totals["blocked"] += counters["blocked"]
+        _page_totals["total_ms"] += timings["total_ms"]
+        _ready_signals[ready_signal] += 1
+    print(f"[INFO] Page loaded in {timings['total_ms']} ms ({ready_signal}), "
+          f"blocked {counters['blocked']}/{counters['requests']} requests: {url}")
+    return timings
+
+
+def get_page_stats():
+    # Totals since the process started, plus the timings of the most recent page loads
+    with _page_timings_lock:
+        stats = dict(_page_totals)
+        stats["ready_signals"] = dict(_ready_signals)
+        stats["recent"] = list(_page_timings)
+    stats["avg_total_ms"] = round(stats["total_ms"] / stats["pages"]) if stats["pages"] else 0
+    stats["blocked_share"] = round(stats["blocked"] / stats["requests"], 3) if stats["requests"] else 0.0
+    return stats
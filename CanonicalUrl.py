@@ -0,0 +1,54 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "igshid",
+    "ref", "ref_src", "ocid", "cmpid", "ito", "spm", "guccounter", "guce_referrer", "guce_referrer_sig",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+# A link without a scheme starts with a host only if its first segment is a dotted hostname,
+# optionally with a port: "example.com:8080/news" but not "news/article-one", "mailto:..." or "article-slug"
+_SCHEMELESS_HOST = re.compile(r"^(?:[^\W_](?:[\w-]*[^\W_])?\.)+([^\W\d_][\w-]*[^\W_])(?::\d*)?(?:[/?#]|$)")
+
+# Last labels that name a file rather than a top-level domain, as in "article.html"
+_FILE_EXTENSIONS = {"html", "htm", "shtml", "xhtml", "php", "asp", "aspx", "jsp", "cfm", "pdf", "xml", "json"}
+
+
+def canonicalize_url(url):
+    """
+    Normalizes an article URL so that links differing only by scheme, "www.", letter case of the
+    host, default port, trailing slash, fragment, tracking parameters or parameter order compare equal.
+    A link without a scheme counts as absolute only if it starts with a dotted hostname ("example.com/news").
+    Relative links, other schemes (mailto:, tel:) and malformed URLs are returned stripped but unchanged.
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if "//" not in url:
+        host_first = _SCHEMELESS_HOST.match(url)
+        if not host_first or host_first.group(1).lower() in _FILE_EXTENSIONS:
+            return url
+    try:
+        parts = urlsplit(url if "//" in url else "//" + url)
+        if parts.scheme not in ("", "http", "https"):
+            return url
+        host = (parts.hostname or "").lower().removeprefix("www.")
+        port = parts.port
+    except ValueError:  # e.g. a port like ":8o8o" or ":99999"
+        return url
+    if not host or any(c.isspace() for c in host):
+        return url
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)]
+    query.sort()
+
+    return urlunsplit(("https", host, path, urlencode(query), ""))
@@ -0,0 +1,117 @@
+import hashlib
+import os
+from datetime import timedelta
+
+from django.utils import timezone
+
+from CanonicalUrl import canonicalize_url
+from company_news.models import CompanyIndustryGroup, Article, SeenArticle
+
+CRAWL_RECHECK_AFTER = int(os.getenv("CRAWL_RECHECK_AFTER", str(7 * 24 * 3600)))  # Seconds before a seen article is downloaded again
+CRAWL_STATE_TTL = int(os.getenv("CRAWL_STATE_TTL", str(30 * 24 * 3600)))  # Seconds a no longer seen article is remembered
+
+SEEN_FIELDS = ['content_hash', 'company_related', 'industry_score', 'fingerprint', 'last_fetched', 'last_seen']
+
+
+def content_hash(text):
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+def _stored_summary(article):
+    # Same shape as a NewsSummary dict, so a stored article can stand in for a new LLM summary
+    return {
+        'title': article.title,
+        'url': article.url,
+        'author': article.author,
+        'publication_date': article.publication_date.isoformat() if article.publication_date else '',
+        'summary': article.summary,
+        'main_topics': [t.topic for t in article.maintopic_set.all()],
+        'fingerprint': article.fingerprint,
+    }
+
+
+class CrawlState:
+    """
+    What earlier refreshes of a company/industry group learned about each candidate article, by
+    canonical URL: its content hash, whether it was about the company, its industry score and
+    fingerprint. A refresh trusts that verdict for CRAWL_RECHECK_AFTER instead of downloading the
+    page again, and reuses the stored summary of an article whose content did not change.
+    """
+
+    def __init__(self, group=None, seen=None, articles=None):
+        self.group = group
+        self._seen = seen or {}  # canonical URL -> SeenArticle, as loaded
+        self._articles = articles or {}  # canonical URL -> stored Article
+        self._updates = {}  # canonical URL -> SeenArticle field values of this run
+
+    @classmethod
+    def load(cls, company_name, industry_name):
+        group = CompanyIndustryGroup.objects.filter(
+            company__name__lower=company_name.lower(),
+            industry__name__lower=industry_name.lower(),
+        ).first()
+        if group is None:
+            return cls()
+        seen = {s.canonical_url: s for s in SeenArticle.objects.filter(group=group)}
+        # Articles stored before canonical URLs were kept have an empty canonical_url
+        articles = {a.canonical_url or canonicalize_url(a.url): a
+                    for a in Article.objects.filter(group=group).prefetch_related('maintopic_set')}
+        print(f"[INFO] Crawl state of {company_name}: {len(seen)} seen articles, {len(articles)} stored")
+        return cls(group, seen, articles)
+
+    def recall(self, url):
+        # Returns the SeenArticle of `url` if its page was read recently enough to be trusted as is.
+        seen = self._seen.get(canonicalize_url(url))
+        if seen is None or seen.last_fetched is None:
+            return None
+        if seen.last_fetched < timezone.now() - timedelta(seconds=CRAWL_RECHECK_AFTER):
+            return None
+        return seen
+
+    def record(self, news, company_related, content=None):
+        # Notes the verdict on a candidate; `content` is given when its page was downloaded in this run.
+        canonical = news.get("canonical_url") or canonicalize_url(news.get("link", ""))
+        seen = self._seen.get(canonical)
+        values = {
+            'company_related': company_related,
+            # The score of a trusted source is not based on its content
+            'industry_score': None if news.get("trusted_source") else news.get("industry_score"),
+            'fingerprint': news.get("fingerprint") or (seen.fingerprint if seen else ''),
+            'content_hash': seen.content_hash if seen else '',
+            'last_fetched': seen.last_fetched if seen else None,
+        }
+        if content is not None:
+            values['content_hash'] = news["content_hash"] = content_hash(content)
+            values['last_fetched'] = timezone.now()
+        self._updates[canonical] = values
+
+    def reusable_summary(self, news):
+        """
+        Returns the stored summary of `news`, unless it was never stored or its content hash
+        changed since the last refresh. Pass as `reuse` to summarize_news / iter_summaries.
+        """
+        canonical = news.get("canonical_url") or canonicalize_url(news.get("link", ""))
+        article = self._articles.get(canonical)
+        if article is None:
+            return None
+        seen = self._seen.get(canonical)
+        new_hash = news.get("content_hash")
+        if new_hash and seen is not None and seen.content_hash and seen.content_hash != new_hash:
+            return None
+        summary = _stored_summary(article)
+        summary['fingerprint'] = news.get("fingerprint") or summary['fingerprint']
+        return summary
+
+    def save(self, group=None):
+        # Upserts this run's verdicts and forgets articles that have not been seen for CRAWL_STATE_TTL.
+        group = group or self.group
+        if group is None or not self._updates:
+            return
+        SeenArticle.objects.bulk_create(
+            [SeenArticle(group=group, canonical_url=canonical, **values) for canonical, values in self._updates.items()],
+            update_conflicts=True,
+            unique_fields=['group', 'canonical_url'],
+            update_fields=SEEN_FIELDS,
+        )
+        SeenArticle.objects.filter(
+            group=group, last_seen__lt=timezone.now() - timedelta(seconds=CRAWL_STATE_TTL)).delete()
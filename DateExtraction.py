@@ -0,0 +1,81 @@
+import re
+from datetime import datetime
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+
+_MONTH = r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?" \
+         r"|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+
+# All supported formats in one alternation, so a text is scanned once. Group names encode the format.
+DATE_PATTERN = re.compile(
+    r"(?<!\d)(?:"
+    r"(?P<iso_y>\d{4})[-.](?P<iso_m>\d{2})[-.](?P<iso_d>\d{2})"  # 2025-05-08, 2025.05.08
+    r"|(?P<us_m>\d{1,2})/(?P<us_d>\d{1,2})/(?P<us_y>\d{4})"  # 05/08/2025 (month first)
+    r"|(?P<eu_d>\d{1,2})\.(?P<eu_m>\d{1,2})\.(?P<eu_y>\d{4})"  # 08.05.2025 (day first)
+    rf"|(?P<dmy_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dmy_m>{_MONTH})(?:,?\s+(?P<dmy_y>\d{{4}}))?"  # 8 May 2025, 8th May
+    rf"|(?P<mdy_m>{_MONTH})\s+(?P<mdy_d>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<mdy_y>\d{{4}})"  # May 8, 2025
+    r")(?!\d)",
+    re.IGNORECASE,
+)
+
+_US_DATE = re.compile(r"\s*(\d{1,2})/(\d{1,2})/(\d{4})")
+
+
+def _month_number(name):
+    return MONTHS[name.lower().rstrip(".")]
+
+
+def _build(match, current_year):
+    g = match.group
+    if g("iso_y"):
+        return datetime(int(g("iso_y")), int(g("iso_m")), int(g("iso_d")))
+    if g("us_y"):
+        month, day = int(g("us_m")), int(g("us_d"))
+        if month > 12:  # 25/05/2025 can only be day first
+            month, day = day, month
+        return datetime(int(g("us_y")), month, day)
+    if g("eu_y"):
+        return datetime(int(g("eu_y")), int(g("eu_m")), int(g("eu_d")))
+    if g("dmy_m"):
+        year = int(g("dmy_y")) if g("dmy_y") else current_year
+        return datetime(year, _month_number(g("dmy_m")), int(g("dmy_d")))
+    return datetime(int(g("mdy_y")), _month_number(g("mdy_m")), int(g("mdy_d")))
+
+
+def extract_date(text, current_year=None):
+    """
+    Returns the first valid date found in `text` as a datetime, or None.
+    Dates without a year (e.g. "8th May") get `current_year`, this year by default.
+    """
+    if not text:
+        return None
+    if current_year is None:
+        current_year = datetime.now().year
+
+    for match in DATE_PATTERN.finditer(text):
+        try:
+            return _build(match, current_year)
+        except ValueError:  # e.g. 31/02/2025
+            continue
+    return None
+
+
+def parse_date(value):
+    # Parses a stored or API-provided date string, like "05/08/2025, 07:00 AM, +0000 UTC" from SerpAPI.
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+
+    match = _US_DATE.match(value)
+    if match:
+        try:
+            return datetime(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+        except ValueError:
+            pass
+    return extract_date(value)
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))  # Global number of parallel fetches
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))  # Parallel fetches against a single host
+FETCH_HOST_DELAY = float(os.getenv("FETCH_HOST_DELAY", "1.0"))  # Seconds between request starts on one host
+
+
+class HostScheduler:
+    # Politeness rules shared by every fetch in the process: at most `per_host` requests
+    # in flight per host and request starts on the same host spaced by `delay` seconds.
+    def __init__(self, per_host=FETCH_PER_HOST, delay=FETCH_HOST_DELAY):
+        self.per_host = max(1, per_host)
+        self.delay = max(0.0, delay)
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def _slot(self, host):
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host)
+                self._slots[host] = slot
+            return slot
+
+    def _reserve_start(self, host):
+        # Books the next free start time on the host and returns how long to wait for it.
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay
+            return start - now
+
+    def run(self, url, fn, *args, **kwargs):
+        host = get_host(url)
+        with self._slot(host):
+            wait = self._reserve_start(host)
+            if wait > 0:
+                time.sleep(wait)
+            return fn(*args, **kwargs)
+
+
+scheduler = HostScheduler()
+
+
+def get_host(url):
+    return urlparse(url).netloc.lower()
+
+
+def _interleave_by_host(indexed_items):
+    # Round-robin over hosts, so workers start on different hosts before queueing on one.
+    buckets = {}
+    for index, item, url in indexed_items:
+        buckets.setdefault(get_host(url), []).append((index, item, url))
+
+    ordered = []
+    queues = list(buckets.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+def fetch_concurrently(items, fetch, get_url=lambda item: item, max_workers=None):
+    """
+    Runs `fetch(url)` for every item in parallel while keeping the per-host politeness rules.
+    Returns a list of (item, result, error) tuples in the order of `items`.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    indexed = [(i, item, get_url(item)) for i, item in enumerate(items)]
+    workers = min(max_workers or FETCH_MAX_WORKERS, len(items))
+    results = [None] * len(items)
+
+    def worker(entry):
+        index, item, url = entry
+        try:
+            results[index] = (item, scheduler.run(url, fetch, url), None)
+        except Exception as e:
+            print(f"[WARN] Fetching {url} failed: {e}")
+            results[index] = (item, None, e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(worker, _interleave_by_host(indexed)))
+
+    return results
+
+
+class FetchPool:
+    """
+    Rolling counterpart of fetch_concurrently for callers that decide what to fetch next from
+    the results so far: `submit` starts a fetch as soon as a slot is free and `next_completed`
+    returns (item, result, error) of whichever fetch finishes first. Per-host politeness applies.
+    """
+
+    def __init__(self, fetch, max_workers=None):
+        self.fetch = fetch
+        self.max_workers = max(1, max_workers or FETCH_MAX_WORKERS)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch-pool")
+        self._futures = {}  # future -> (item, url)
+
+    @property
+    def in_flight(self):
+        return len(self._futures)
+
+    def has_free_slot(self):
+        return len(self._futures) < self.max_workers
+
+    def submit(self, item, url):
+        future = self._executor.submit(scheduler.run, url, self.fetch, url)
+        self._futures[future] = (item, url)
+
+    def next_completed(self):
+        done, _ = wait(self._futures, return_when=FIRST_COMPLETED)
+        future = next(iter(done))
+        item, url = self._futures.pop(future)
+        try:
+            return item, future.result(), None
+        except Exception as e:
+            print(f"[WARN] Fetching {url} failed: {e}")
+            return item, None, e
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
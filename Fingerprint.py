@@ -0,0 +1,107 @@
+import re
+from collections import defaultdict
+from hashlib import blake2b
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16  # LSH bands of 4 rows: pairs above ~0.5 similarity almost always share a band
+NEAR_DUPLICATE_SIMILARITY = 0.7  # Estimated Jaccard similarity of the shingle sets
+FINGERPRINT_MAX_WORDS = 500  # The lead of an article is enough to recognize a republished copy
+SHINGLE_SIZE = 3
+
+_ROWS = MINHASH_PERMUTATIONS // MINHASH_BANDS
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+_WORD = re.compile(r"\w+")
+
+
+def _hash64(value):
+    return int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# Fixed permutations, so fingerprints stored by earlier runs stay comparable
+_PERMUTATIONS = [(_hash64(f"minhash-a-{i}") % (_PRIME - 1) + 1, _hash64(f"minhash-b-{i}") % _PRIME)
+                 for i in range(MINHASH_PERMUTATIONS)]
+
+
+def shingles(text):
+    words = _WORD.findall((text or "").lower())[:FINGERPRINT_MAX_WORDS]
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    MinHash signature of the word shingles of `text`: MINHASH_PERMUTATIONS 32-bit values whose
+    share of equal positions between two texts estimates the Jaccard similarity of their shingles.
+    Returns None for a text without words.
+    """
+    hashes = [_hash64(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MASK for a, b in _PERMUTATIONS)
+
+
+def article_fingerprint(news):
+    return minhash(news.get("title", "") + "\n" + (news.get("content") or ""))
+
+
+def to_hex(fingerprint):
+    return "".join(f"{value:08x}" for value in fingerprint) if fingerprint else ""
+
+
+def from_hex(value):
+    if not value or len(value) != MINHASH_PERMUTATIONS * 8:
+        return None
+    try:
+        return tuple(int(value[i:i + 8], 16) for i in range(0, len(value), 8))
+    except ValueError:
+        return None
+
+
+def similarity(a, b):
+    return sum(1 for x, y in zip(a, b) if x == y) / MINHASH_PERMUTATIONS
+
+
+def _bands(fingerprint):
+    return [(band, fingerprint[band * _ROWS:(band + 1) * _ROWS]) for band in range(MINHASH_BANDS)]
+
+
+class FingerprintIndex:
+    """
+    LSH index of MinHash fingerprints. Every fingerprint is bucketed by each of its bands, so a
+    lookup only compares the few entries sharing a band instead of the whole index.
+    """
+
+    def __init__(self, threshold=NEAR_DUPLICATE_SIMILARITY):
+        self.threshold = threshold
+        self._fingerprints = {}  # key -> fingerprint
+        self._buckets = defaultdict(set)  # (band, rows) -> keys
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def add(self, key, fingerprint):
+        self.remove(key)
+        self._fingerprints[key] = fingerprint
+        for bucket in _bands(fingerprint):
+            self._buckets[bucket].add(key)
+
+    def remove(self, key):
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for bucket in _bands(fingerprint):
+            keys = self._buckets[bucket]
+            keys.discard(key)
+            if not keys:
+                del self._buckets[bucket]
+
+    def query(self, fingerprint):
+        # Keys of the near-duplicates of `fingerprint`, most similar first
+        candidates = set()
+        for bucket in _bands(fingerprint):
+            candidates.update(self._buckets.get(bucket, ()))
+        scored = [(similarity(fingerprint, self._fingerprints[key]), key) for key in candidates]
+        return [key for score, key in sorted(scored, key=lambda pair: pair[0], reverse=True)
+                if score >= self.threshold]
@@ -0,0 +1,100 @@
+import os
+import threading
+import weakref
+
+import httpx
+
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_ENABLE_HTTP2 = os.getenv("HTTP_ENABLE_HTTP2", "true").lower() == "true"
+
+_client = None
+_client_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "reused": 0, "new": 0, "http2": 0, "errors": 0}
+_seen_streams = weakref.WeakSet()  # Network streams (= pooled connections) that already served a request
+
+
+def _build_client():
+    limits = httpx.Limits(
+        max_connections=HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    try:
+        return httpx.Client(http2=HTTP_ENABLE_HTTP2, limits=limits, timeout=timeout, headers=headers,
+                            follow_redirects=True)
+    except ImportError:
+        # HTTP/2 needs the optional `h2` package
+        print("[WARN] HTTP/2 support is not installed, falling back to HTTP/1.1")
+        return httpx.Client(limits=limits, timeout=timeout, headers=headers, follow_redirects=True)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def _record(response):
+    stream = response.extensions.get("network_stream")
+    with _stats_lock:
+        _stats["requests"] += 1
+        if response.http_version == "HTTP/2":
+            _stats["http2"] += 1
+        if stream is None:
+            return
+        try:
+            if stream in _seen_streams:
+                _stats["reused"] += 1
+            else:
+                _seen_streams.add(stream)
+                _stats["new"] += 1
+        except TypeError:
+            pass
+
+
+def http_get(url, timeout=None, headers=None):
+    """
+    GET through the shared connection pool. `timeout` overrides the read timeout for this call.
+    """
+    kwargs = {}
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, HTTP_CONNECT_TIMEOUT))
+    if headers:
+        kwargs["headers"] = headers
+
+    try:
+        response = get_client().get(url, **kwargs)
+    except Exception:
+        with _stats_lock:
+            _stats["errors"] += 1
+        raise
+
+    _record(response)
+    return response
+
+
+def get_pool_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    tracked = stats["reused"] + stats["new"]
+    stats["hit_rate"] = round(stats["reused"] / tracked, 3) if tracked else 0.0
+    return stats
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
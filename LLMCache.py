@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import timedelta
+
+from django.utils import timezone
+
+from company_news.models import LLMCacheEntry
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # Seconds a cached result stays valid
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_EVICT_EVERY = 100  # Size check after this many writes
+
+# Prompts whose answer goes stale faster than the default TTL
+PROMPT_TTLS = {
+    "FindNewsFromLinks": 6 * 3600,
+}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0, "tokens_saved": 0}
+
+
+class CachedResponse:
+    # Mimics the parts of a parsed Responses API result that the callers read.
+    def __init__(self, output_text, text_format):
+        self.output_text = output_text
+        self.output_parsed = text_format.model_validate_json(output_text)
+        self.usage = None
+        self.cached = True
+
+
+def cache_key(prompt_name, prompt_version, compiled_prompt, model, text_format, variant=""):
+    # `variant` separates answers to the same prompt about different content, e.g. a page's content hash
+    fields = {
+        "prompt_name": prompt_name or "",
+        "prompt_version": str(prompt_version or ""),
+        "input": compiled_prompt,
+        "model": model,
+        "schema": text_format.model_json_schema(),
+    }
+    if variant:
+        fields["variant"] = variant
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _count(name, value=1):
+    with _stats_lock:
+        _stats[name] += value
+
+
+def get_cached_response(key, text_format):
+    if not LLM_CACHE_ENABLED:
+        return None
+    try:
+        now = timezone.now()
+        entry = LLMCacheEntry.objects.filter(key=key, expires_at__gt=now).first()
+        if entry is None:
+            _count("misses")
+            return None
+        response = CachedResponse(entry.output_text, text_format)
+        LLMCacheEntry.objects.filter(pk=entry.pk).update(last_used_at=now)
+    except Exception as e:
+        print(f"[WARN] LLM cache lookup failed: {e}")
+        _count("errors")
+        return None
+
+    _count("hits")
+    _count("tokens_saved", entry.total_tokens)
+    return response
+
+
+def store_response(key, response, prompt_name, prompt_version, model):
+    if not LLM_CACHE_ENABLED or not isinstance(getattr(response, "output_text", None), str):
+        return
+    usage = getattr(response, "usage", None)
+    ttl = PROMPT_TTLS.get(prompt_name, LLM_CACHE_TTL)
+    now = timezone.now()
+    try:
+        LLMCacheEntry.objects.update_or_create(key=key, defaults={
+            "prompt_name": prompt_name or "",
+            "prompt_version": str(prompt_version or ""),
+            "model": model,
+            "output_text": response.output_text,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+        })
+    except Exception as e:
+        print(f"[WARN] LLM cache write failed: {e}")
+        _count("errors")
+        return
+
+    _count("writes")
+    if _stats["writes"] % LLM_CACHE_EVICT_EVERY == 0:
+        evict()
+
+
+def evict():
+    # Drops expired entries, then the least recently used ones above LLM_CACHE_MAX_ENTRIES.
+    try:
+        LLMCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        overflow = LLMCacheEntry.objects.count() - LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            stale_ids = list(LLMCacheEntry.objects.order_by("last_used_at").values_list("pk", flat=True)[:overflow])
+            LLMCacheEntry.objects.filter(pk__in=stale_ids).delete()
+    except Exception as e:
+        print(f"[WARN] LLM cache eviction failed: {e}")
+
+
+def get_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
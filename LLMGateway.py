@@ -0,0 +1,111 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError, InternalServerError
+
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "90"))  # Seconds for a single attempt
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", "180"))  # Seconds for a call including its retries
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_MAX_BACKOFF = float(os.getenv("LLM_MAX_BACKOFF", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+_client = None
+_client_lock = threading.Lock()
+
+_metrics = {}  # prompt name -> counters
+_metrics_lock = threading.Lock()
+
+
+class LLMGatewayError(Exception):
+    pass
+
+
+def _limits():
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                load_dotenv()
+                # Retries are done here, so the SDK's own retry loop is switched off
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, timeout=LLM_REQUEST_TIMEOUT,
+                                 http_client=httpx.Client(limits=_limits(),
+                                                          timeout=LLM_REQUEST_TIMEOUT))
+    return _client
+
+
+def _is_retryable(error):
+    if isinstance(error, (RateLimitError, InternalServerError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error, attempt):
+    # Honors Retry-After when the API sends it, otherwise exponential backoff with full jitter.
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), LLM_MAX_BACKOFF)
+    except (TypeError, ValueError):
+        return random.uniform(0, min(2 ** attempt, LLM_MAX_BACKOFF))
+
+
+def _record(prompt_name, started, response=None, error=None, retries=0):
+    usage = getattr(response, "usage", None)
+    with _metrics_lock:
+        m = _metrics.setdefault(prompt_name or "-", {
+            "calls": 0, "errors": 0, "retries": 0, "latency_ms": 0.0, "input_tokens": 0, "output_tokens": 0,
+        })
+        m["calls"] += 1
+        m["retries"] += retries
+        m["latency_ms"] += (time.monotonic() - started) * 1000
+        if error is not None:
+            m["errors"] += 1
+        if usage is not None:
+            m["input_tokens"] += getattr(usage, "input_tokens", 0) or 0
+            m["output_tokens"] += getattr(usage, "output_tokens", 0) or 0
+
+
+def _request_kwargs(prompt, text_format, model, web_search):
+    kwargs = {"model": model, "store": False, "input": prompt, "text_format": text_format}
+    if web_search:
+        kwargs["tools"] = [{"type": "web_search_preview"}]
+    return kwargs
+
+
+def parse_response(prompt, text_format, model, prompt_name="", web_search=True, deadline=LLM_CALL_DEADLINE):
+    """
+    Calls the Responses API through the shared client. Retries 429 and 5xx answers with jittered
+    backoff until `deadline` seconds have passed and raises LLMGatewayError when the call fails.
+    """
+    started = time.monotonic()
+    kwargs = _request_kwargs(prompt, text_format, model, web_search)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        remaining = deadline - (time.monotonic() - started)
+        try:
+            response = get_client().responses.parse(timeout=max(1.0, min(LLM_REQUEST_TIMEOUT, remaining)), **kwargs)
+            _record(prompt_name, started, response=response, retries=attempt)
+            return response
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if not _is_retryable(e) or attempt == LLM_MAX_RETRIES or delay >= deadline - (time.monotonic() - started):
+                _record(prompt_name, started, error=e, retries=attempt)
+                raise LLMGatewayError(f"{prompt_name or 'LLM'} call failed: {e}") from e
+            print(f"[WARN] {prompt_name or 'LLM'} call failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def get_gateway_metrics():
+    with _metrics_lock:
+        metrics = {name: dict(m) for name, m in _metrics.items()}
+    for m in metrics.values():
+        m["avg_latency_ms"] = round(m["latency_ms"] / m["calls"]) if m["calls"] else 0
+        m["latency_ms"] = round(m["latency_ms"])
+    return metrics
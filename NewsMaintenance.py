@@ -1,21 +1,19 @@
 import re
-from dotenv import load_dotenv
 import os
 
-from langfuse import Langfuse
 from pydantic import BaseModel, Field
 
 from PromptMaintenance import get_prompt, query_openai_responses_web_search
 from company_news.models import Company, Industry, CompanyIndustryGroup, Article, MainTopic
 
-import requests
+from HttpClient import http_get
 from bs4 import BeautifulSoup
 import html2text
 
 
 def extract_full_page_markdown(url: str) -> str:
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_get(url, timeout=10)
         resp.raise_for_status()
 
         soup = BeautifulSoup(resp.text, "html.parser")
@@ -40,7 +38,7 @@ def extract_full_page_markdown(url: str) -> str:
 
 def extract_full_article_text(url):
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_get(url, timeout=10)
         soup = BeautifulSoup(resp.text, "html.parser")
 
         paragraphs = soup.find_all("p")
@@ -69,75 +67,218 @@ def get_url_slug(url): # Returns the last element of URL without trailing slash.
 
 from typing import List
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def summarize_news(news_list, company_name):
-    load_dotenv()
+from django.core.cache import cache
+from django.db import connection, transaction
 
-    langfuse = Langfuse(
-        public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-        secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-        host=os.getenv("LANGFUSE_HOST")
-    )
+from CanonicalUrl import canonicalize_url
+from CrawlState import content_hash
+from Fingerprint import FingerprintIndex, from_hex
+from DateExtraction import parse_date
 
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))  # Parallel summarization calls
+
+
+class NewsSummary(BaseModel):
+    title: str = ""
+    url: str = ""
+    author: str = ""
+    publication_date: str = ""
+    summary: str = ""
+    main_topics: List[str] = Field(default_factory=list)
+
+
+def summarize_article(prompt, news):
+    system_message = prompt.compile(news_url=news.get('link'))
+
+    # The prompt only names the URL: the content hash keeps a cached summary of an earlier version
+    # of the page from being returned once its content changed
+    page_hash = news.get('content_hash') or (content_hash(news['content']) if news.get('content') else '')
+
+    # Rate limits and server errors are retried by the LLM gateway
+    response = query_openai_responses_web_search(system_message, NewsSummary, langfuse_prompt=prompt,
+                                                 cache_variant=page_hash)
+
+    if not isinstance(response.output_text, str):
+        print("[WARN] output_text is not a string: ", response.output_text)
+        return None
+
+    parsed = json.loads(response.output_text)
+    summary = NewsSummary(**parsed).dict()
+    if news.get('fingerprint'):
+        summary['fingerprint'] = news['fingerprint']  # Kept for near-duplicate matching in save_final_news
+    return summary
+
+
+def iter_summaries(news_list, company_name, reuse=None):
+    """
+    Yields (index, summary) pairs as soon as each summary is ready; `index` is the position in
+    `news_list`. Failed articles are skipped. Closing the generator cancels the pending calls.
+    `reuse(news)` may return a stored summary, which is yielded first instead of calling the LLM.
+    """
     print("Summarizing news...")
-    try:
-        prompt = get_prompt("NewsSummaryWizard")
-        if prompt:
-            final_news = []
-
-            class NewsSummary(BaseModel):
-                title: str = ""
-                url: str = ""
-                author: str = ""
-                publication_date: str = ""
-                summary: str = ""
-                main_topics: List[str] = Field(default_factory=list)
-
-            for n in news_list:
-                # trace = langfuse.trace(name="Create news summary", user_id=company_name)
-                system_message = prompt.compile(news_url=n.get('link'))
-
-                # generation = trace.generation(
-                #     name="Summarize news article",
-                #     model="gpt-4o-mini",
-                #     input={"prompt": system_message}
-                # )
-
-                response = query_openai_responses_web_search(system_message, NewsSummary)
-
-                # generation.end(output=response)
-
-                if isinstance(response.output_text, str):
-                    parsed = json.loads(response.output_text)
-                    news_obj = NewsSummary(**parsed)
-                    final_news.append(news_obj.dict())
-                else:
-                    print("[WARN] output_text is not a string: ", response.output_text)
-
-            return final_news
+    if not news_list:
+        return
+
+    pending = []
+    for index, news in enumerate(news_list):
+        summary = reuse(news) if reuse else None
+        if summary:
+            yield index, summary
         else:
-            return []
-    except Exception as e:
-        print(f"[ERROR] An error occurred while summarizing the news: {e}")
-        return []
+            pending.append((index, news))
+    if len(pending) < len(news_list):
+        print(f"[INFO] Reused {len(news_list) - len(pending)} stored summaries")
+
+    prompt = get_prompt("NewsSummaryWizard") if pending else None
+    if not prompt:
+        return
+
+    def summarize(news):
+        try:
+            return summarize_article(prompt, news)
+        except Exception as e:
+            print(f"[ERROR] An error occurred while summarizing {news.get('link')}: {e}")
+            return None
+
+    executor = ThreadPoolExecutor(max_workers=min(SUMMARY_CONCURRENCY, len(pending)))
+    futures = {executor.submit(summarize, news): index for index, news in pending}
+    try:
+        for future in as_completed(futures):
+            summary = future.result()
+            if summary:
+                yield futures[future], summary
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def summarize_news(news_list, company_name, reuse=None):
+    # Sorted back into the input order, so the ranking of the articles is preserved
+    summaries = sorted(iter_summaries(news_list, company_name, reuse=reuse), key=lambda pair: pair[0])
+    return [summary for _, summary in summaries]
+
+
+ARTICLE_FIELDS = ['title', 'url', 'canonical_url', 'author', 'publication_date', 'summary', 'fingerprint']
+
+
+def _article_values(news):
+    publication_date = parse_date(news.get('publication_date'))
+    return {
+        'title': news['title'][:500],
+        'url': news['url'],
+        'author': (news.get('author') or '')[:255],
+        'publication_date': publication_date.date() if publication_date else None,
+        'summary': news.get('summary', ''),
+        'fingerprint': news.get('fingerprint') or '',
+    }
+
+
+def articles_cache_key(group_id):
+    # Serialized articles of a group, see get_company_news
+    return f"company_news:articles:{group_id}"
 
 
 def save_final_news(final_news, searched_company, base_url, user_industry):
-    company, _ = Company.objects.get_or_create(name=searched_company, defaults={'website': base_url})
-    industry, _ = Industry.objects.get_or_create(name=user_industry)
-    group, _ = CompanyIndustryGroup.objects.get_or_create(company=company, industry=industry)
-
-    Article.objects.filter(group=group).delete()
-
-    for news in final_news:
-        article = Article.objects.create(
-            group=group,
-            title=news['title'],
-            url=news['url'],
-            author=news.get('author', ''),
-            publication_date=news.get('publication_date'),
-            summary=news.get('summary', '')
-        )
-
-        for topic in news.get('main_topics', []):
-            MainTopic.objects.create(article=article, topic=topic)
+    """
+    Upserts the group's articles on their canonical URL, or failing that on a near-duplicate
+    fingerprint, in one transaction: new articles are bulk-created, changed ones bulk-updated,
+    unchanged ones keep their rows and topics, and articles missing from `final_news` are removed.
+    Returns the group.
+    """
+    started = time.perf_counter()
+    query_count = [0]
+
+    def count_queries(execute, sql, params, many, context):
+        query_count[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries), transaction.atomic():
+        company, _ = Company.objects.get_or_create(name=searched_company, defaults={'website': base_url})
+        industry, _ = Industry.objects.get_or_create(name=user_industry)
+        group, _ = CompanyIndustryGroup.objects.get_or_create(company=company, industry=industry)
+        # Row lock: concurrent saves of the same group are applied one after another
+        group = CompanyIndustryGroup.objects.select_for_update().get(pk=group.pk)
+        group.save(update_fields=['last_updated'])  # Freshness of the stored news is judged by this timestamp
+
+        incoming = {}
+        for news in final_news:
+            if news.get('url') and news.get('title'):
+                incoming[canonicalize_url(news['url'])] = news
+
+        existing = {}
+        duplicates = []  # Rows stored twice under links with the same canonical form
+        for article in Article.objects.filter(group=group).prefetch_related('maintopic_set'):
+            # Rows saved before canonical_url existed have it empty until they are next updated
+            canonical = article.canonical_url or canonicalize_url(article.url)
+            if canonical in existing:
+                duplicates.append(article)
+            else:
+                existing[canonical] = article
+
+        # Articles with a new URL that are near-duplicates of a stored one (the same story republished
+        # elsewhere) take over the stored row instead of adding a second copy
+        fingerprints = FingerprintIndex()
+        for canonical, article in existing.items():
+            fingerprint = from_hex(article.fingerprint)
+            if fingerprint is not None and canonical not in incoming:
+                fingerprints.add(canonical, fingerprint)
+
+        to_create, to_update, retopic = [], [], []
+        topics = {}
+        near_duplicates = 0
+        for canonical, news in incoming.items():
+            values = _article_values(news)
+            values['canonical_url'] = canonical
+            new_topics = list(news.get('main_topics', []))
+            article = existing.pop(canonical, None)
+
+            fingerprint = from_hex(values['fingerprint'])
+            if article is None and fingerprint is not None:
+                matches = fingerprints.query(fingerprint)
+                if matches:
+                    article = existing.pop(matches[0])
+                    fingerprints.remove(matches[0])
+                    near_duplicates += 1
+            if article is not None and not values['fingerprint']:
+                values['fingerprint'] = article.fingerprint  # Keep the stored one when none was computed
+
+            if article is None:
+                article = Article(group=group, **values)
+                to_create.append(article)
+                retopic.append(article)
+            else:
+                if any(getattr(article, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(article, field, value)
+                    to_update.append(article)
+                if [t.topic for t in article.maintopic_set.all()] != new_topics:
+                    retopic.append(article)
+            topics[canonical] = new_topics
+
+        retopic_existing = [a.pk for a in retopic if a.pk is not None]
+        removed = list(existing.values()) + duplicates
+        if removed:
+            Article.objects.filter(pk__in=[a.pk for a in removed]).delete()
+        if retopic_existing:
+            MainTopic.objects.filter(article_id__in=retopic_existing).delete()
+        if to_create:
+            Article.objects.bulk_create(to_create)
+        if to_update:
+            Article.objects.bulk_update(to_update, ARTICLE_FIELDS)
+
+        MainTopic.objects.bulk_create([
+            MainTopic(article=article, topic=topic)
+            for article in retopic
+            for topic in topics[article.canonical_url]
+        ])
+
+        transaction.on_commit(lambda: cache.delete(articles_cache_key(group.pk)))
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"[INFO] Saved news for {searched_company}: {len(to_create)} new, {len(to_update)} updated, "
+          f"{len(incoming) - len(to_create) - len(to_update)} unchanged, {len(removed)} removed, "
+          f"{near_duplicates} near-duplicates merged "
+          f"in {query_count[0]} queries, {elapsed_ms:.0f} ms")
+    return group
@@ -1,44 +1,108 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from langfuse import Langfuse
-from openai import OpenAI
 
+from LLMCache import cache_key, get_cached_response, store_response
+from LLMGateway import parse_response
 
-def get_prompt(prompt_name):
-    load_dotenv()
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+PROMPT_REFRESH_TTL = int(os.getenv("PROMPT_REFRESH_TTL", "300"))  # Seconds before a prompt is refreshed in the background
+
+_langfuse = None
+_langfuse_lock = threading.Lock()
+
+_prompts = {}  # prompt name -> (prompt, fetched_at)
+_prompts_lock = threading.Lock()
+_refreshing = set()
+
+
+def get_langfuse():
+    # One Langfuse client for the whole process
+    global _langfuse
+    if _langfuse is None:
+        with _langfuse_lock:
+            if _langfuse is None:
+                load_dotenv()
+                _langfuse = Langfuse(
+                    public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
+                    secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
+                    host=os.getenv("LANGFUSE_HOST")
+                )
+    return _langfuse
 
-    try:
-        langfuse = Langfuse(
-            public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-            secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-            host=os.getenv("LANGFUSE_HOST")
-        )
 
-        langfuse.auth_check()
+def _load_prompt(prompt_name):
+    prompt = get_langfuse().get_prompt(prompt_name)
+    with _prompts_lock:
+        _prompts[prompt_name] = (prompt, time.monotonic())
+    return prompt
 
-        prompt = langfuse.get_prompt(prompt_name)
 
-        return prompt
+def _refresh_prompt(prompt_name):
+    try:
+        _load_prompt(prompt_name)
     except Exception as e:
-        print(e)
+        print(f"[WARN] Could not refresh prompt {prompt_name}, keeping the last known version: {e}")
+    finally:
+        with _prompts_lock:
+            _refreshing.discard(prompt_name)
+
+
+def get_prompt(prompt_name):
+    """
+    Returns the prompt from the in-memory registry. Only the first lookup of a prompt waits for
+    Langfuse; stale prompts are served as they are while a background thread refreshes them.
+    """
+    with _prompts_lock:
+        entry = _prompts.get(prompt_name)
+        stale = entry is not None and time.monotonic() - entry[1] > PROMPT_REFRESH_TTL
+        if stale and prompt_name not in _refreshing:
+            _refreshing.add(prompt_name)
+            threading.Thread(target=_refresh_prompt, args=(prompt_name,), daemon=True).start()
+
+    if entry is not None:
+        return entry[0]
 
-def query_openai_responses_web_search(prompt, text_format):
     try:
-        load_dotenv()
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        response = client.responses.parse(
-            model="gpt-4o-mini",
-            tools=[{"type": "web_search_preview"}],
-            store=False,
-            input=prompt,
-            text_format=text_format
-        )
-
-        return response
+        return _load_prompt(prompt_name)
     except Exception as e:
         print(e)
-        return []
+
+
+# Prompts a pipeline run may need: finding the news tab, reading a listing, summarizing
+PIPELINE_PROMPTS = ("FindNewsTab", "FindNewsFromLinks", "NewsSummaryWizard")
+
+
+def preload_prompts(prompt_names=PIPELINE_PROMPTS):
+    for prompt_name in prompt_names:
+        get_prompt(prompt_name)
+
+def query_openai_responses_web_search(prompt, text_format, langfuse_prompt=None, use_cache=True, cache_variant=""):
+    """
+    Structured Responses API call with web search, served from the LLM cache when possible.
+    `langfuse_prompt` is the prompt `prompt` was compiled from; its name and version are part of
+    the cache key and label the gateway metrics. `cache_variant` is added to the cache key when the
+    answer depends on more than the prompt, such as the current content of the page it names.
+    Raises LLMGatewayError when the call fails.
+    """
+    prompt_name = getattr(langfuse_prompt, "name", "")
+    prompt_version = getattr(langfuse_prompt, "version", "")
+    key = cache_key(prompt_name, prompt_version, prompt, OPENAI_MODEL, text_format,
+                    variant=cache_variant) if use_cache else None
+
+    if key:
+        cached = get_cached_response(key, text_format)
+        if cached is not None:
+            return cached
+
+    response = parse_response(prompt, text_format, OPENAI_MODEL, prompt_name=prompt_name)
+
+    if key:
+        store_response(key, response, prompt_name, prompt_version, OPENAI_MODEL)
+
+    return response
 
 # def query_openai_responses(prompt, text_format):
 #     try:
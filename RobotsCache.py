@@ -0,0 +1,93 @@
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from HttpClient import http_get
+
+ROBOTS_CACHE_TTL = int(os.getenv("ROBOTS_CACHE_TTL", "86400"))  # Default lifetime of a parsed robots.txt
+ROBOTS_CACHE_MIN_TTL = int(os.getenv("ROBOTS_CACHE_MIN_TTL", "300"))  # Lower bound for server-provided lifetimes
+ROBOTS_FAILURE_TTL = int(os.getenv("ROBOTS_FAILURE_TTL", "600"))  # Lifetime of a failed download
+
+_cache = {}  # robots.txt URL -> (RobotFileParser or None, expires_at)
+_cache_lock = threading.Lock()
+_fetch_locks = {}
+
+
+def get_robots_url(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+
+def _ttl_from_headers(headers):
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return ROBOTS_CACHE_MIN_TTL
+
+    max_age = re.search(r"max-age=(\d+)", cache_control)
+    if max_age:
+        ttl = int(max_age.group(1))
+    elif headers.get("Expires"):
+        try:
+            ttl = parsedate_to_datetime(headers["Expires"]).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return ROBOTS_CACHE_TTL
+    else:
+        return ROBOTS_CACHE_TTL
+
+    return min(max(ttl, ROBOTS_CACHE_MIN_TTL), ROBOTS_CACHE_TTL)
+
+
+def _download(robots_url):
+    # Returns (parser, ttl). A parser of None marks a failed download.
+    try:
+        response = http_get(robots_url, timeout=10)
+    except Exception as e:
+        print(f"[ERROR] An error occurred while downloading robots.txt: {e}")
+        return None, ROBOTS_FAILURE_TTL
+
+    if response.status_code >= 500:
+        print(f"[WARN] robots.txt returned {response.status_code}: {robots_url}")
+        return None, ROBOTS_FAILURE_TTL
+
+    rp = RobotFileParser(robots_url)
+    if response.status_code >= 400:
+        rp.allow_all = True  # Missing robots.txt means no restrictions
+    else:
+        rp.parse(response.text.splitlines())
+    return rp, _ttl_from_headers(response.headers)
+
+
+def get_robots_parser(url):
+    """
+    Returns the parsed robots.txt for the host of `url`, or None if it could not be downloaded.
+    Parsers are shared by the whole process until their TTL runs out.
+    """
+    robots_url = get_robots_url(url)
+
+    with _cache_lock:
+        entry = _cache.get(robots_url)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        fetch_lock = _fetch_locks.setdefault(robots_url, threading.Lock())
+
+    # Only one thread downloads a given robots.txt, the others wait for its result.
+    with fetch_lock:
+        with _cache_lock:
+            entry = _cache.get(robots_url)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+
+        rp, ttl = _download(robots_url)
+
+        with _cache_lock:
+            _cache[robots_url] = (rp, time.monotonic() + ttl)
+        return rp
+
+
+def clear_robots_cache():
+    with _cache_lock:
+        _cache.clear()
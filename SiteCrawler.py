@@ -1,41 +1,52 @@
 import os
+import threading
+import time
 from typing import List
-from urllib.robotparser import RobotFileParser
 
-import requests
+from HttpClient import http_get
 from bs4 import BeautifulSoup
-import time
 from urllib.parse import urljoin
 
-from dotenv import load_dotenv
-from langfuse import Langfuse
-from playwright.sync_api import sync_playwright
 import re
 from datetime import datetime
 from pydantic import BaseModel
 from NewsMaintenance import extract_full_article_text, get_url_slug
+from FetchScheduler import fetch_concurrently, get_host
+from RobotsCache import get_robots_parser
+from BrowserPool import get_browser_pool, load_page
 from urllib.parse import urlparse
-from dateutil.parser import parse
+from DateExtraction import extract_date
+from CanonicalUrl import canonicalize_url
 from PromptMaintenance import get_prompt, query_openai_responses_web_search
 
 def is_allowed_to_crawl(base_url):
-    robots_url = base_url.split('/')[0] + '//' + base_url.split('/')[2] + '/robots.txt'
-    try:
-        response = requests.get(robots_url, timeout=10)
-        robots_txt = response.text
-
-        rp = RobotFileParser()
-        rp.parse(robots_txt.splitlines())
+    rp = get_robots_parser(base_url)
+    if rp is None:
+        return True
 
-        if rp.can_fetch("*", base_url):
-            print(f"[INFO] Crawling is allowed on {base_url}")
-            return True
-        else:
-            print(f"[INFO] Crawling is not allowed on {base_url} as per robots.txt")
-            return False
-    except Exception as e:
-        print(f"[ERROR] An error occurred while checking robots.txt: {e}")
+    if rp.can_fetch("*", base_url):
+        print(f"[INFO] Crawling is allowed on {base_url}")
         return True
+    else:
+        print(f"[INFO] Crawling is not allowed on {base_url} as per robots.txt")
+        return False
+
+STATIC_MIN_ARTICLES = int(os.getenv("STATIC_MIN_ARTICLES", "3"))  # Static listings below this use the browser
+LISTING_MODE_TTL = int(os.getenv("LISTING_MODE_TTL", "86400"))  # How long a domain's listing mode is trusted
+
+_listing_modes = {}  # domain -> (mode, expires_at); mode is "static" or "browser"
+_listing_modes_lock = threading.Lock()
+
+def get_listing_mode(domain):
+    with _listing_modes_lock:
+        entry = _listing_modes.get(domain)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+def set_listing_mode(domain, mode):
+    with _listing_modes_lock:
+        _listing_modes[domain] = (mode, time.monotonic() + LISTING_MODE_TTL)
 
 def find_news_page(base_url, keywords=None):
     if not is_allowed_to_crawl(base_url):
@@ -46,7 +57,7 @@ def find_news_page(base_url, keywords=None):
 
     try:
         print(f"[INFO] Searching for news tab on {base_url}...")
-        resp = requests.get(base_url, timeout=10)
+        resp = http_get(base_url, timeout=10)
         soup = BeautifulSoup(resp.text, "html.parser")
         links = soup.find_all("a", href=True)
 
@@ -63,14 +74,6 @@ def find_news_page(base_url, keywords=None):
     return None
 
 def find_news_page_with_openai(base_url, searched_company):
-    load_dotenv()
-
-    langfuse = Langfuse(
-        public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-        secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-        host=os.getenv("LANGFUSE_HOST")
-    )
-
     print("Searching for news tab with OPENAI...")
     try:
         prompt = get_prompt("FindNewsTab")
@@ -87,7 +90,7 @@ def find_news_page_with_openai(base_url, searched_company):
             class NewsTab(BaseModel):
                 URL: str
 
-            response = query_openai_responses_web_search(system_message, NewsTab)
+            response = query_openai_responses_web_search(system_message, NewsTab, langfuse_prompt=prompt)
             # generation.end(output=response)
             print(response)
 
@@ -104,14 +107,6 @@ def find_news_page_with_openai(base_url, searched_company):
         return None
 
 def find_articles_with_openai(news_url, searched_company):
-    load_dotenv()
-
-    langfuse = Langfuse(
-        public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-        secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-        host=os.getenv("LANGFUSE_HOST")
-    )
-
     print("Searching for news with OPENAI...")
     try:
         prompt = get_prompt("FindNewsFromLinks")
@@ -133,10 +128,13 @@ def find_articles_with_openai(news_url, searched_company):
             class NewsList(BaseModel):
                 articles: List[NewsArticle]
 
-            response = query_openai_responses_web_search(system_message, NewsList)
+            response = query_openai_responses_web_search(system_message, NewsList, langfuse_prompt=prompt)
             # generation.end(output=response)
 
             openai_news = [article.dict() for article in response.output_parsed.articles]
+            # The model may return links relative to the news page
+            for article in openai_news:
+                article["link"] = urljoin(news_url, article["link"].strip())
             print(f"[INFO] Successfully collected {len(openai_news)} news articles.")
             return openai_news
         else:
@@ -146,107 +144,168 @@ def find_articles_with_openai(news_url, searched_company):
         print("[ERROR] ", e)
         return []
 
-def extract_articles_with_playwright(news_url, max_articles=10, min_title_length=20):
-    if not is_allowed_to_crawl(news_url):
-        return None
-
+# Collects every anchor of the page in one browser round trip. Ancestor texts are shared
+# between anchors of the same list, so each distinct element's text is sent only once.
+ANCHOR_SNAPSHOT_JS = """
+(anchors, depth) => {
+    const textIndex = new Map();
+    const texts = [];
+    const indexOf = (el) => {
+        if (!textIndex.has(el)) {
+            textIndex.set(el, texts.length);
+            texts.push(el.innerText || '');
+        }
+        return textIndex.get(el);
+    };
+    const links = anchors.map(a => {
+        const ancestors = [];
+        let el = a.parentElement;
+        for (let i = 0; i < depth && el; i++) {
+            ancestors.push(indexOf(el));
+            el = el.parentElement;
+        }
+        return {href: a.getAttribute('href') || '', text: a.innerText || '', ancestors};
+    });
+    return {links, texts};
+}
+"""
+
+def select_article_links(news_url, snapshot, max_articles=10, min_title_length=20):
+    # Picks dated article links from an anchor snapshot, whether it came from the browser or static HTML.
     added = set()
+    texts = snapshot["texts"]
+    links_info = []
+    today = datetime.today()
+    current_year = today.year
+
+    base_path = urlparse(news_url).path.rstrip()
 
-    def extract_date_from_text(text):
-        patterns = [
-            (r"\d{4}-\d{2}-\d{2}", 1),  # Format: 2025-05-08
-            (r"\d{2}/\d{2}/\d{4}", 2),  # Format: 08/05/2025
-            (r"\d{1,2}\s+\w+\s+\d{4}", 3),  # Format: 8 May 2025
-            (r"\w+\s+\d{1,2},\s+\d{4}", 4),  # Format: May 8, 2025
-            (r"\d{1,2}\.\d{1,2}\.\d{4}", 5),  # Format: 08.05.2025
-            (r"\d{1,2}(st|nd|rd|th)?\s+[A-Za-z]{3,}", 6),  # Format: 8th May
-            (r"\d{4}\.\d{2}\.\d{2}", 7)  # Format: 2025.05.08
-        ]
-        for pattern, fmt in patterns:
-            match = re.search(pattern, text)
-            if match:
-                if fmt == 6:
-                    match = re.sub(r"(st|nd|rd|th)", "", match.group(0))
-                    current_year = datetime.now().year
-                    match += (" " + str(current_year))
-                    return match
-                return match.group(0)
-        return ""
-
-    with sync_playwright() as p:
+    for a in snapshot["links"]:
         try:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            print(f"[INFO] Loading the page: {news_url}")
-            page.goto(news_url, timeout=60000)
-            page.wait_for_timeout(3000)
+            title = a["text"].strip()
+            href = a["href"]
+            full_url = urljoin(news_url, href)
 
-            anchors = page.query_selector_all("a[href]")
-            links_info = []
+            if not full_url.startswith(news_url+"/"):
+                if not urlparse(full_url).path.startswith(base_path+"/"):
+                    if not len(get_url_slug(full_url)) > 20:
+                        continue
+            if not title or not href:
+                continue
+            if href.startswith("javascript") or href.startswith("#"):
+                continue
+            if len(title) < min_title_length:
+                continue
+            canonical_url = canonicalize_url(full_url)
+            if canonical_url in added:
+                continue
+
+            # Searching for publication date in the closest surrounding of the link
+            parsed_date = None
+            for text_index in a["ancestors"]:  # Texts of a few superior levels
+                parsed_date = extract_date(texts[text_index], current_year)
+                if parsed_date:
+                    break
 
-            base_path = urlparse(news_url).path.rstrip()
+            if not parsed_date:
+                print(f"[INFO] Missing date for URL: {full_url}")
+                continue
+            if parsed_date > today:
+                parsed_date = parsed_date.replace(year=parsed_date.year-1)
+
+            links_info.append({
+                "title": clear_title(title),
+                "link": full_url,
+                "date": parsed_date.strftime("%m/%d/%Y"),
+                "parsed_date": parsed_date
+            })
+            added.add(canonical_url)
+            if len(links_info) >= max_articles:
+                break
         except Exception as e:
-            print(e)
-            return []
+            print(f"[WARN] An error occurred while analyzing the URL: {e}")
+
+    return links_info
+
+def snapshot_anchors_from_html(html, depth=3):
+    # Same shape as ANCHOR_SNAPSHOT_JS output, built from server-rendered HTML.
+    soup = BeautifulSoup(html, "html.parser")
+    text_index = {}
+    texts = []
+    links = []
+
+    for a in soup.find_all("a", href=True):
+        ancestors = []
+        el = a.parent
+        for _ in range(depth):
+            if el is None or el.name == "[document]":
+                break
+            if id(el) not in text_index:
+                text_index[id(el)] = len(texts)
+                texts.append(el.get_text(" ", strip=True))
+            ancestors.append(text_index[id(el)])
+            el = el.parent
+        links.append({"href": a["href"], "text": a.get_text(" ", strip=True), "ancestors": ancestors})
+
+    return {"links": links, "texts": texts}
+
+def extract_articles_from_static_html(news_url, max_articles=10, min_title_length=20):
+    if not is_allowed_to_crawl(news_url):
+        return None
 
-        for a in anchors:
-            try:
-                title = a.inner_text().strip()
-                href = a.get_attribute("href")
-                full_url = urljoin(news_url, href)
-
-                if not full_url.startswith(news_url+"/"):
-                    if not urlparse(full_url).path.startswith(base_path+"/"):
-                        if not len(get_url_slug(full_url)) > 20:
-                            continue
-                if not title or not href:
-                    continue
-                if href.startswith("javascript") or href.startswith("#"):
-                    continue
-                if len(title) < min_title_length:
-                    continue
-                if full_url in added:
-                    continue
-
-                # Searching for publication date in the closest surrounding of the link
-                date_text = ""
-                parent = a
-                for _ in range(3):  # Search through few superior levels
-                    parent = parent.evaluate_handle("e => e.parentElement")
-                    siblings_text = parent.evaluate("e => e.innerText || ''")
-                    date_text = extract_date_from_text(siblings_text)
-                    if date_text:
-                        break
-
-                if date_text:
-                    try:
-                        parsed_date = parse(date_text)
-                        if parsed_date > datetime.today():
-                            parsed_date = parsed_date.replace(year=parsed_date.year-1)
-                    except Exception as e:
-                        print(f"[WARN] Could not parse the date: {date_text} -> {e}")
-                        continue
-                else:
-                    print(f"[INFO] Missing date for URL: {full_url}")
-                    continue
-
-                if not parsed_date:
-                    continue
-
-                links_info.append({
-                    "title": clear_title(title),
-                    "link": full_url,
-                    "date": parsed_date.strftime("%m/%d/%Y")
-                })
-                added.add(full_url)
-                if len(links_info) >= max_articles:
-                    break
-            except Exception as e:
-                print(f"[WARN] An error occurred while analyzing the URL: {e}")
+    try:
+        print(f"[INFO] Loading the static page: {news_url}")
+        resp = http_get(news_url, timeout=10)
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"[WARN] Could not download the static page: {e}")
+        return []
+
+    snapshot = snapshot_anchors_from_html(resp.text)
+    links_info = select_article_links(news_url, snapshot, max_articles, min_title_length)
+    print(f"[INFO] Static HTML: collected {len(links_info)} news articles.")
+    return links_info
+
+def extract_articles_with_playwright(news_url, max_articles=10, min_title_length=20):
+    if not is_allowed_to_crawl(news_url):
+        return None
+
+    def snapshot_anchors(page):
+        print(f"[INFO] Loading the page: {news_url}")
+        load_page(page, news_url)
+        return page.eval_on_selector_all("a[href]", ANCHOR_SNAPSHOT_JS, 3)
+
+    try:
+        snapshot = get_browser_pool().run(snapshot_anchors)
+    except Exception as e:
+        print(e)
+        return []
 
-        browser.close()
-        print(f"[INFO] Successfully collected {len(links_info)} news articles.")
-        return links_info
+    links_info = select_article_links(news_url, snapshot, max_articles, min_title_length)
+    print(f"[INFO] Successfully collected {len(links_info)} news articles.")
+    return links_info
+
+def extract_articles(news_url, max_articles=10):
+    """
+    Collects the news listing from static HTML first and starts the browser only when that
+    result is empty or too small. The path that worked is remembered per domain.
+    """
+    domain = get_host(news_url)
+    mode = get_listing_mode(domain)
+    static_articles = []
+
+    if mode != "browser":
+        static_articles = extract_articles_from_static_html(news_url, max_articles=max_articles) or []
+        if len(static_articles) >= min(STATIC_MIN_ARTICLES, max_articles):
+            set_listing_mode(domain, "static")
+            return static_articles
+        print(f"[INFO] Static HTML not sufficient for {domain} ({len(static_articles)} articles), using the browser")
+
+    browser_articles = extract_articles_with_playwright(news_url, max_articles=max_articles) or []
+    if len(browser_articles) > len(static_articles):
+        set_listing_mode(domain, "browser")
+        return browser_articles
+    return static_articles
 
 
 def clear_title(text):
@@ -259,7 +318,8 @@ def clear_title(text):
     except Exception as e:
         print(f"[ERR] An error occurred while clearing the title: {e}")
 
-def scrape_company_news(base_url, searched_company, max_articles=10, deep_scrape=True):
+def scrape_company_news(base_url, searched_company, max_articles=10, deep_scrape=True, skip_fetch=None):
+    # Articles for which `skip_fetch(link)` is true are returned without their content.
     news_url = find_news_page(base_url)
     if not news_url:
         print("[FAIL] News tab not found")
@@ -271,7 +331,7 @@ def scrape_company_news(base_url, searched_company, max_articles=10, deep_scrape
     articles = set()
 
     try:
-        articles = extract_articles_with_playwright(news_url, max_articles=max_articles)
+        articles = extract_articles(news_url, max_articles=max_articles)
     except Exception as e:
         print(e)
 
@@ -283,14 +343,15 @@ def scrape_company_news(base_url, searched_company, max_articles=10, deep_scrape
 
     # Deep scraping only if any news articles were found
     if deep_scrape:
-        articles_final = []
-        for a in articles:
-            try:
-                a["content"] = extract_full_article_text(a["link"])
-                time.sleep(1.0)
+        articles_final = [a for a in articles if skip_fetch and skip_fetch(a["link"])]
+        to_fetch = [a for a in articles if not (skip_fetch and skip_fetch(a["link"]))]
+        if articles_final:
+            print(f"[INFO] Skipping {len(articles_final)} articles read by a recent refresh")
+        fetched = fetch_concurrently(to_fetch, extract_full_article_text, get_url=lambda a: a["link"])
+        for a, content, error in fetched:
+            if error is None:
+                a["content"] = content
                 articles_final.append(a)
-            except Exception as e:
-                print(e)
     else:
         articles_final = articles
 
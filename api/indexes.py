@@ -0,0 +1,52 @@
+import threading
+import time
+
+from django.db.models.signals import post_save, post_delete
+
+
+class ModelIndex:
+    """
+    In-memory lookup structure built from the rows of `model` by `build()`. It is rebuilt when a
+    row is saved or deleted in this process, and after `ttl` seconds so that changes made by other
+    processes show up too. Values derived from the index, e.g. compiled matchers, are kept until
+    the next rebuild.
+    """
+
+    def __init__(self, model, build, ttl):
+        self.build = build
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._derived = {}
+        self._lock = threading.Lock()
+        uid = f"{model._meta.label}:{build.__module__}.{build.__qualname__}"
+        post_save.connect(self._invalidate, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self._invalidate, sender=model, weak=False, dispatch_uid=uid)
+
+    def _current(self):
+        # Called with the lock held
+        if self._value is None or self._expires_at <= time.monotonic():
+            self._value = self.build()
+            self._expires_at = time.monotonic() + self.ttl
+            self._derived.clear()
+        return self._value
+
+    def get(self):
+        with self._lock:
+            return self._current()
+
+    def derive(self, key, factory):
+        # Returns `factory(index)`, computed once per `key` until the index is rebuilt
+        with self._lock:
+            value = self._current()
+            if key not in self._derived:
+                self._derived[key] = factory(value)
+            return self._derived[key]
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+            self._derived.clear()
+
+    def _invalidate(self, sender, **kwargs):
+        self.clear()
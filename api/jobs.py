@@ -0,0 +1,298 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from company_news.models import NewsJob, NewsBatch
+from BrowserPool import get_page_stats
+from CrawlState import CrawlState
+from HttpClient import get_pool_stats
+from LLMCache import get_cache_stats
+from LLMGateway import get_gateway_metrics
+from NewsMaintenance import save_final_news
+from PromptMaintenance import preload_prompts
+from .serializers import NewsSerializer
+from .utils import get_news
+
+NEWS_JOB_WORKERS = int(os.getenv("NEWS_JOB_WORKERS", "2"))  # Pipelines running at the same time in this process
+NEWS_JOB_HEARTBEAT_INTERVAL = int(os.getenv("NEWS_JOB_HEARTBEAT_INTERVAL", "30"))  # Seconds between heartbeats of owned jobs
+NEWS_JOB_STALE_AFTER = int(os.getenv("NEWS_JOB_STALE_AFTER", "150"))  # Unfinished jobs without a heartbeat for this long are orphaned
+NEWS_JOB_WAIT_TIMEOUT = int(os.getenv("NEWS_JOB_WAIT_TIMEOUT", "600"))  # Seconds a blocking request waits for its job
+NEWS_JOB_POLL_INTERVAL = 1.0
+
+_executor = ThreadPoolExecutor(max_workers=NEWS_JOB_WORKERS, thread_name_prefix="news-job")
+_local_lock = threading.Lock()  # Used instead of the advisory lock on databases other than PostgreSQL
+
+_owned_jobs = set()  # Queued or running jobs of this process, kept alive by _heartbeat_loop
+_owned_lock = threading.Lock()
+_heartbeat_thread = None
+
+
+def coalesce_key(company_name, company_website, searched_industry):
+    # Requests for the same company, website and industry share one pipeline run.
+    host = urlparse(company_website if "//" in company_website else "//" + company_website).netloc.lower()
+    host = host.removeprefix("www.")
+    company = " ".join(company_name.split()).casefold()
+    industry = " ".join(searched_industry.split()).casefold()
+    return hashlib.sha256(f"{company}|{host}|{industry}".encode("utf-8")).hexdigest()
+
+
+def _advisory_lock(key):
+    # Transaction-scoped, so it is released on commit. Serializes job lookup + creation across processes.
+    lock_id = int(key[:16], 16) - (1 << 63)  # Signed 64-bit
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_id])
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(NEWS_JOB_HEARTBEAT_INTERVAL)
+        with _owned_lock:
+            job_ids = list(_owned_jobs)
+        if not job_ids:
+            continue
+        try:
+            NewsJob.objects.filter(id__in=job_ids, status__in=('queued', 'running')).update(
+                heartbeat_at=timezone.now())
+        except Exception as e:
+            print(f"[WARN] Could not update the heartbeat of {len(job_ids)} news jobs: {e}")
+        finally:
+            close_old_connections()
+
+
+def _own(job_id):
+    # Jobs are alive as long as the process that queued or runs them keeps beating for them.
+    global _heartbeat_thread
+    with _owned_lock:
+        _owned_jobs.add(job_id)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="news-job-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+            # First job of this process: the prompts load from Langfuse while its pages are scraped
+            threading.Thread(target=preload_prompts, name="prompt-preload", daemon=True).start()
+
+
+def _release(job_id):
+    with _owned_lock:
+        _owned_jobs.discard(job_id)
+
+
+def fail_orphaned_jobs(key=None):
+    # Unfinished jobs whose process stopped beating for them (e.g. lost on a restart) are marked failed.
+    now = timezone.now()
+    jobs = NewsJob.objects.filter(status__in=('queued', 'running'),
+                                  heartbeat_at__lt=now - timedelta(seconds=NEWS_JOB_STALE_AFTER))
+    if key is not None:
+        jobs = jobs.filter(coalesce_key=key)
+    failed = jobs.update(status='failed', error='The worker process running this job stopped', finished_at=now)
+    if failed:
+        print(f"[WARN] Marked {failed} orphaned news jobs as failed")
+    return failed
+
+
+def _find_or_create_job(key, company_name, company_website, searched_industry, save_results, reuse_after):
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            _advisory_lock(key)
+        now = timezone.now()
+        fail_orphaned_jobs(key)
+        job = NewsJob.objects.filter(
+            coalesce_key=key,
+            status__in=('queued', 'running'),
+        ).order_by('created_at').first()
+        if job is None and reuse_after:
+            job = NewsJob.objects.filter(
+                coalesce_key=key,
+                save_results=save_results,
+                created_at__gte=now - timedelta(seconds=reuse_after),
+            ).order_by('-created_at').first()
+        if job is not None:
+            if save_results and not job.save_results:
+                NewsJob.objects.filter(id=job.id).update(save_results=True)
+            return job, False
+
+        job = NewsJob.objects.create(
+            company_name=company_name,
+            company_website=company_website,
+            searched_industry=searched_industry,
+            coalesce_key=key,
+            save_results=save_results,
+        )
+        return job, True
+
+
+def get_or_create_job(company_name, company_website, searched_industry, save_results=False, reuse_after=0):
+    """
+    Returns (job, created). If an identical search is already queued or running, in this or
+    another worker process, its job is returned instead of starting a second pipeline.
+    With `reuse_after` a job created within that many seconds is returned even if it has finished.
+    """
+    key = coalesce_key(company_name, company_website, searched_industry)
+    args = (key, company_name, company_website, searched_industry, save_results, reuse_after)
+    if connection.vendor == 'postgresql':
+        return _find_or_create_job(*args)
+
+    with _local_lock:
+        return _find_or_create_job(*args)
+
+
+def submit_job(company_name, company_website, searched_industry, save_results=False, reuse_after=0):
+    job, created = get_or_create_job(company_name, company_website, searched_industry, save_results, reuse_after)
+    if created:
+        _own(job.id)
+        _executor.submit(run_job, job.id)
+    else:
+        print(f"[INFO] Joining the running job {job.id} for {company_name}")
+    return job
+
+
+def submit_batch(companies, save_results=False):
+    """
+    Queues one job per company; the jobs share the worker pool, browsers, HTTP pool and caches
+    of this process and run at most NEWS_JOB_WORKERS at a time. Identical entries and companies
+    already being searched join the existing job.
+    """
+    batch = NewsBatch.objects.create()
+    jobs = [submit_job(c['CompanyName'], c['CompanyWebsite'], c['SearchedIndustry'], save_results=save_results)
+            for c in companies]
+    batch.jobs.add(*jobs)
+    return batch, jobs
+
+
+def serialize_batch(batch, include_articles=False):
+    jobs = list(batch.jobs.order_by('created_at'))
+    counts = {value: 0 for value, _ in NewsJob.STATUS_CHOICES}
+    for job in jobs:
+        counts[job.status] += 1
+
+    serialized_jobs = []
+    for job in jobs:
+        data = serialize_job(job)
+        data['company_name'] = job.company_name
+        data['searched_industry'] = job.searched_industry
+        if not include_articles:
+            data.pop('articles')
+        serialized_jobs.append(data)
+
+    return {
+        'batch_id': str(batch.id),
+        'total': len(jobs),
+        'counts': counts,
+        'finished': counts['done'] + counts['failed'] == len(jobs),
+        'jobs': serialized_jobs,
+    }
+
+
+def refresh_cache_key(key):
+    # Id of the refresh job a stale group's readers are pointed to during its cooldown
+    return f"company_news:refresh_job:{key}"
+
+
+def request_refresh(company, industry):
+    """
+    Background refresh of a company's stored news, at most one per NEWS_REFRESH_COOLDOWN_SECONDS.
+    Returns the id of the refresh job. During the cooldown the id comes from the cache, so polling
+    readers of a stale group do not take the job lock and query the jobs on every request.
+    """
+    key = refresh_cache_key(coalesce_key(company.name, company.website, industry.name))
+    job_id = cache.get(key)
+    if job_id is not None:
+        return job_id
+
+    job = submit_job(company.name, company.website, industry.name, save_results=True,
+                     reuse_after=settings.NEWS_REFRESH_COOLDOWN_SECONDS)
+    remaining = settings.NEWS_REFRESH_COOLDOWN_SECONDS - (timezone.now() - job.created_at).total_seconds()
+    if remaining >= 1:
+        cache.set(key, job.id, int(remaining))
+    return job.id
+
+
+def run_news_search(company_name, company_website, searched_industry):
+    # Blocking variant: runs the pipeline in the calling thread, or waits for the identical run in progress.
+    job, created = get_or_create_job(company_name, company_website, searched_industry)
+    if created:
+        run_job(job.id)
+    else:
+        print(f"[INFO] Waiting for the running job {job.id} for {company_name}")
+    return wait_for_job(job.id)
+
+
+def wait_for_job(job_id, timeout=NEWS_JOB_WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = NewsJob.objects.get(id=job_id)
+        if job.status in ('done', 'failed') or time.monotonic() >= deadline:
+            return job
+        if job.heartbeat_at < timezone.now() - timedelta(seconds=NEWS_JOB_STALE_AFTER):
+            fail_orphaned_jobs(job.coalesce_key)
+            continue
+        time.sleep(NEWS_JOB_POLL_INTERVAL)
+
+
+def run_job(job_id):
+    close_old_connections()
+    _own(job_id)
+    try:
+        job = NewsJob.objects.get(id=job_id)
+        NewsJob.objects.filter(id=job_id).update(status='running', started_at=timezone.now(),
+                                                 heartbeat_at=timezone.now())
+
+        def progress(stage, percent):
+            NewsJob.objects.filter(id=job_id).update(stage=stage, progress=percent, heartbeat_at=timezone.now())
+
+        crawl_state = CrawlState.load(job.company_name, job.searched_industry)
+        final_news = get_news(job.company_website, job.searched_industry, job.company_name, progress=progress,
+                              crawl_state=crawl_state)
+        result = NewsSerializer(final_news, many=True).data
+
+        # Re-read the flag: a refresh request may have joined the job while it was running
+        if final_news and NewsJob.objects.filter(id=job_id, save_results=True).exists():
+            progress("Saving news", 95)
+            group = save_final_news(final_news, job.company_name, job.company_website, job.searched_industry)
+            crawl_state.save(group)
+
+        NewsJob.objects.filter(id=job_id).update(
+            status='done',
+            stage='Finished',
+            progress=100,
+            result=result,
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        print(f"[ERROR] News job {job_id} failed: {e}")
+        NewsJob.objects.filter(id=job_id).update(status='failed', error=str(e), finished_at=timezone.now())
+    finally:
+        _release(job_id)
+        print(f"[INFO] Metrics after news job {job_id}: {collect_metrics()}")
+        close_old_connections()
+
+
+def collect_metrics():
+    # Process-wide counters of the shared fetch and model layers, see the metrics endpoint
+    return {
+        'http_pool': get_pool_stats(),
+        'page_loads': get_page_stats(),
+        'llm_cache': get_cache_stats(),
+        'llm_calls': get_gateway_metrics(),
+    }
+
+
+def serialize_job(job):
+    return {
+        'job_id': str(job.id),
+        'status': job.status,
+        'stage': job.stage,
+        'progress': job.progress,
+        'articles': job.result if job.status == 'done' else None,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
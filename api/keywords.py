@@ -0,0 +1,82 @@
+import os
+import re
+
+from company_news.models import IndustryKeywords
+from .indexes import ModelIndex
+
+KEYWORD_INDEX_TTL = int(os.getenv("KEYWORD_INDEX_TTL", "600"))  # Max age in seconds of the keyword lists
+
+
+def _trie_regex(words):
+    # Folds the words into a prefix tree, e.g. ["tech", "technology", "trading"] -> "t(?:ech(?:nology)?|rading)",
+    # so the regex engine never retries a shared prefix.
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        optional = "" in node
+        branches = [(r"\s+" if char == " " else re.escape(char)) + render(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            body = f"(?:{body})?"
+        return body
+
+    return render(trie)
+
+
+class KeywordScorer:
+    """
+    Scores texts by the share of an industry's keywords they contain. All keywords are compiled
+    into one case-insensitive regex matched on whole words, so a text is scanned once whatever the
+    number of keywords. Keywords nested in a longer one ("intelligence" in "artificial intelligence")
+    are found too, as long as they start at a different word.
+    """
+
+    def __init__(self, keywords):
+        normalized = {" ".join(k.lower().split()): k for k in keywords if k and k.strip()}
+        self.keywords = sorted(normalized)
+        self.pattern = None
+        if self.keywords:
+            self.pattern = re.compile(rf"(?<!\w)(?=({_trie_regex(self.keywords)})(?!\w))", re.IGNORECASE)
+
+    def matches(self, text):
+        if not self.pattern or not text:
+            return set()
+        return {" ".join(m.group(1).lower().split()) for m in self.pattern.finditer(text)}
+
+    def score(self, text):
+        if not self.keywords:
+            return 0.0
+        return min(len(self.matches(text)) / len(self.keywords), 1.0)  # Normalize to 0-1
+
+
+def _load_keywords():
+    keywords = {}
+    for industry, keyword in IndustryKeywords.objects.values_list("industry__name", "keyword"):
+        keywords.setdefault(industry.lower(), []).append(keyword)
+    print(f"[INFO] Keyword index built: {sum(len(k) for k in keywords.values())} keywords "
+          f"in {len(keywords)} industries")
+    return keywords
+
+
+_keyword_index = ModelIndex(IndustryKeywords, _load_keywords, KEYWORD_INDEX_TTL)  # industry (lowercase) -> keywords
+
+
+def get_keyword_scorer(industry):
+    """
+    Returns the compiled scorer of `industry`. An industry without keywords in the database is
+    scored by its own name.
+    """
+    industry = (industry or "").lower()
+    return _keyword_index.derive(industry, lambda keywords: KeywordScorer(keywords.get(industry) or [industry]))
+
+
+def clear_keyword_index():
+    _keyword_index.clear()
@@ -26,7 +26,7 @@ class MainTopicSerializer(serializers.ModelSerializer):
         fields = ['topic']
 
 class ArticleSerializer(serializers.ModelSerializer):
-    main_topics = MainTopicSerializer(many=True, source='topic_set')
+    main_topics = MainTopicSerializer(many=True, source='maintopic_set')
 
     class Meta:
         model = Article
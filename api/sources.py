@@ -0,0 +1,60 @@
+import os
+from urllib.parse import urlsplit
+
+from company_news.models import IndustrySources
+from .indexes import ModelIndex
+
+SOURCE_INDEX_TTL = int(os.getenv("SOURCE_INDEX_TTL", "600"))  # Max age in seconds of the trusted source hosts
+
+# Hosts never used as news sources, unless an industry trusts them explicitly
+EXCLUDED_SOURCES = {"ft.com"}
+
+
+def normalize_host(value):
+    # "https://www.Example.com/path" and "example.com" both give "example.com"
+    value = (value or "").strip().lower()
+    try:
+        host = urlsplit(value if "//" in value else "//" + value).hostname or ""
+    except ValueError:
+        return ""
+    return host.removeprefix("www.").rstrip(".")
+
+
+def host_suffixes(host):
+    # "a.b.example.com" -> "a.b.example.com", "b.example.com", "example.com", "com"
+    labels = host.split(".")
+    return (".".join(labels[i:]) for i in range(len(labels)))
+
+
+def matches_source(host, sources):
+    """
+    True if `host` is one of `sources` or a subdomain of one. Costs one set lookup per label of
+    the host, whatever the number of sources, and never matches text in the path or query.
+    """
+    return bool(host) and any(suffix in sources for suffix in host_suffixes(host))
+
+
+def _build_index():
+    index = {}
+    rows = IndustrySources.objects.values_list("industry__name", "source")
+    for industry, source in rows:
+        host = normalize_host(source)
+        if host:
+            index.setdefault(industry.lower(), set()).add(host)
+    print(f"[INFO] Source index built: {sum(len(s) for s in index.values())} sources in {len(index)} industries")
+    return index
+
+
+_source_index = ModelIndex(IndustrySources, _build_index, SOURCE_INDEX_TTL)  # industry (lowercase) -> source hosts
+
+
+def get_source_index():
+    return _source_index.get()
+
+
+def get_trusted_sources(industry):
+    return get_source_index().get((industry or "").lower(), set())
+
+
+def clear_source_index():
+    _source_index.clear()
@@ -0,0 +1,77 @@
+import json
+import queue
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+from CrawlState import CrawlState
+from NewsMaintenance import iter_summaries
+from .serializers import NewsSerializer
+from .utils import select_best_news
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+
+def stream_news_events(company_website, searched_industry, company_name):
+    """
+    Runs the news pipeline on a background thread and yields its events: progress updates, the
+    number of selected candidates, then every summarized article as soon as it is ready.
+    Closing the generator (client disconnect) stops the remaining summarization calls.
+    """
+    events = queue.Queue()
+    cancelled = threading.Event()
+
+    def progress(stage, percent):
+        events.put({'event': 'progress', 'stage': stage, 'progress': percent})
+
+    def run():
+        try:
+            # Read-only: a stream reuses what refreshes stored but does not save anything itself
+            crawl_state = CrawlState.load(company_name, searched_industry)
+            best_news = select_best_news(company_website, searched_industry, company_name, progress=progress,
+                                         crawl_state=crawl_state)
+            events.put({'event': 'candidates', 'count': len(best_news)})
+            progress("Summarizing news", 70)
+
+            summaries = iter_summaries(best_news, company_name, reuse=crawl_state.reusable_summary)
+            sent = 0
+            for index, summary in summaries:
+                if cancelled.is_set():
+                    summaries.close()
+                    return
+                sent += 1
+                events.put({'event': 'article', 'rank': index + 1, 'article': NewsSerializer(summary).data})
+            events.put({'event': 'done', 'count': sent})
+        except Exception as e:
+            print(f"[ERROR] News stream for {company_name} failed: {e}")
+            events.put({'event': 'error', 'error': str(e)})
+        finally:
+            events.put(None)
+            close_old_connections()
+
+    threading.Thread(target=run, name="news-stream", daemon=True).start()
+
+    try:
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield event
+    finally:
+        cancelled.set()
+
+
+def format_event(event, stream_format):
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    if stream_format == 'sse':
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def stream_news(company_website, searched_industry, company_name, stream_format):
+    for event in stream_news_events(company_website, searched_industry, company_name):
+        yield format_event(event, stream_format)
@@ -0,0 +1,270 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from CanonicalUrl import canonicalize_url
+from Fingerprint import article_fingerprint, to_hex
+from NewsMaintenance import save_final_news, summarize_article
+from api.keywords import clear_keyword_index, get_keyword_scorer
+from api.sources import clear_source_index, get_trusted_sources
+from api.utils import iter_unique_by_link, select_top_news
+from company_news.models import (Company, Industry, CompanyIndustryGroup, Article, MainTopic, NewsJob,
+                                   IndustryKeywords, IndustrySources)
+
+
+class GetCompanyNewsQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name="Acme", website="https://acme.com")
+        industry = Industry.objects.create(name="fintech")
+        cls.group = CompanyIndustryGroup.objects.create(company=company, industry=industry)
+        for i in range(5):
+            article = Article.objects.create(
+                group=cls.group,
+                title=f"Acme news {i}",
+                url=f"https://acme.com/news/{i}",
+                canonical_url=f"https://acme.com/news/{i}",
+                publication_date=f"2025-05-0{i + 1}",
+                summary="Summary",
+            )
+            MainTopic.objects.bulk_create([MainTopic(article=article, topic=f"Topic {t}") for t in range(3)])
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('get_company_news')
+        self.params = {'CompanyName': 'acme', 'SearchedIndustry': 'FinTech'}
+
+    def test_articles_and_topics_in_fixed_number_of_queries(self):
+        # Joined group lookup, articles, prefetched topics; independent of the number of articles
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, self.params)
+
+        self.assertEqual(response.status_code, 200)
+        articles = response.json()['articles']
+        self.assertEqual(len(articles), 5)
+        self.assertEqual(articles[0]['title'], "Acme news 4")
+        self.assertEqual(len(articles[0]['main_topics']), 3)
+
+    def test_cached_articles_need_only_the_group_lookup(self):
+        first = self.client.get(self.url, self.params)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, self.params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['articles'], first.json()['articles'])
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    @mock.patch('api.jobs.preload_prompts')
+    @mock.patch('api.jobs._executor')
+    def test_stale_group_polls_reuse_the_refresh_job(self, executor, preload_prompts):
+        CompanyIndustryGroup.objects.filter(pk=self.group.pk).update(
+            last_updated=timezone.now() - timedelta(seconds=settings.NEWS_FRESH_FOR_SECONDS + 60))
+        first = self.client.get(self.url, self.params).json()['freshness']
+        self.assertEqual(first['state'], 'stale')
+        self.assertEqual(executor.submit.call_count, 1)
+
+        # Group lookup and cached articles only: the refresh job id comes from the cache during its cooldown
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, self.params)
+
+        self.assertEqual(response.json()['freshness']['refresh_job_id'], first['refresh_job_id'])
+        self.assertEqual(NewsJob.objects.count(), 1)
+        self.assertEqual(executor.submit.call_count, 1)
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url, self.params)['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+
+class CanonicalizeUrlTests(SimpleTestCase):
+    def test_equivalent_links_compare_equal(self):
+        self.assertEqual(canonicalize_url("HTTP://WWW.Example.com:443/News/?b=2&utm_source=x&a=1#top"),
+                         "https://example.com/News?a=1&b=2")
+        self.assertEqual(canonicalize_url("example.com/news/"), "https://example.com/news")
+        self.assertEqual(canonicalize_url("//cdn.example.com/a"), "https://cdn.example.com/a")
+
+    def test_relative_links_are_unchanged(self):
+        for url in ("news/article-one", "article-slug", "article.html", "/news/1", "../news", "?page=2"):
+            with self.subTest(url=url):
+                self.assertEqual(canonicalize_url(url), url)
+
+    def test_text_and_other_schemes_are_unchanged(self):
+        for url in ("not a url", "mailto:press@example.com", "tel:123456", "javascript:void(0)"):
+            with self.subTest(url=url):
+                self.assertEqual(canonicalize_url(url), url)
+
+    def test_ports(self):
+        self.assertEqual(canonicalize_url("example.com:8080/path"), "https://example.com:8080/path")
+        self.assertEqual(canonicalize_url("http://example.com:80/"), "https://example.com/")
+        for url in ("https://example.com:99999/", "https://example.com:8o8o/"):
+            with self.subTest(url=url):
+                self.assertEqual(canonicalize_url(url), url)
+
+
+class IterUniqueByLinkTests(SimpleTestCase):
+    def test_skips_links_without_a_web_host(self):
+        news = [{'link': link} for link in (
+            "https://www.example.com/news/1/", "news/rel-article", "/news/2", "mailto:press@example.com",
+            "not a url", "http://[broken/", "", None, "https://example.com/news/1?utm_source=x")]
+        stats = {}
+
+        unique = list(iter_unique_by_link(news, stats))
+
+        self.assertEqual([n['canonical_url'] for n in unique], ["https://example.com/news/1"])
+        self.assertEqual(stats, {'bad_link': 7, 'duplicates': 1})
+
+
+class SummaryCacheTests(TestCase):
+    def setUp(self):
+        self.prompt = SimpleNamespace(name="NewsSummaryWizard", version=1,
+                                      compile=lambda news_url: f"Summarize {news_url}")
+        self.calls = 0
+
+        def parse_response(prompt, text_format, model, prompt_name=""):
+            self.calls += 1
+            output = json.dumps({'title': "Acme news", 'summary': f"Summary {self.calls}"})
+            return SimpleNamespace(output_text=output, usage=None)
+
+        patcher = mock.patch('PromptMaintenance.parse_response', parse_response)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def summarize(self, content_hash):
+        news = {'link': "https://acme.com/news/1", 'content_hash': content_hash}
+        return summarize_article(self.prompt, news)['summary']
+
+    def test_unchanged_content_is_served_from_the_cache(self):
+        self.assertEqual(self.summarize("a" * 64), "Summary 1")
+        self.assertEqual(self.summarize("a" * 64), "Summary 1")
+        self.assertEqual(self.calls, 1)
+
+    def test_changed_content_is_summarized_again(self):
+        self.assertEqual(self.summarize("a" * 64), "Summary 1")
+        self.assertEqual(self.summarize("b" * 64), "Summary 2")
+        self.assertEqual(self.calls, 2)
+
+
+class SelectTopNewsTests(TestCase):
+    def test_failed_fetches_are_counted_apart_from_unrelated_articles(self):
+        def fetch(url):
+            if "broken" in url:
+                raise ConnectionError("Connection reset")
+            return "Acme raised a new round" if "acme" in url else "Nothing about the company"
+
+        candidates = [{'title': f"Article {i}", 'link': link, 'parsed_date': datetime(2025, 5, i + 1)}
+                      for i, link in enumerate(("https://broken.example.com/1", "https://other.example.org/2",
+                                                "https://acme.example.net/3"))]
+        stats = {}
+
+        with mock.patch('api.utils.extract_full_article_text', fetch):
+            top = select_top_news(candidates, "fintech", "Acme", stats=stats)
+
+        self.assertEqual([n['link'] for n in top], ["https://acme.example.net/3"])
+        self.assertEqual(stats['fetched'], 3)
+        self.assertEqual(stats['fetch_failed'], 1)
+        self.assertEqual(stats['not_company_related'], 1)
+
+
+class IndustryIndexTests(TestCase):
+    def setUp(self):
+        # Rolled back rows send no signals, so other tests must not see the indexes built here
+        self.addCleanup(clear_keyword_index)
+        self.addCleanup(clear_source_index)
+
+    def test_keyword_and_source_changes_rebuild_the_indexes(self):
+        industry = Industry.objects.create(name="Fintech")
+        IndustryKeywords.objects.create(industry=industry, keyword="payments")
+        IndustrySources.objects.create(industry=industry, source="https://www.finextra.com")
+        self.assertEqual(get_keyword_scorer("fintech").keywords, ["payments"])
+        self.assertEqual(get_trusted_sources("fintech"), {"finextra.com"})
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_keyword_scorer("FinTech"), get_keyword_scorer("fintech"))
+            get_trusted_sources("fintech")
+
+        IndustryKeywords.objects.create(industry=industry, keyword="neobank")
+        IndustrySources.objects.filter(industry=industry).delete()
+        self.assertEqual(get_keyword_scorer("fintech").keywords, ["neobank", "payments"])
+        self.assertEqual(get_trusted_sources("fintech"), set())
+
+
+class SaveFinalNewsTests(TestCase):
+    STORY = " ".join(f"word{i}" for i in range(200))
+
+    def setUp(self):
+        company = Company.objects.create(name="Acme", website="https://acme.com")
+        industry = Industry.objects.create(name="Fintech")
+        self.group = CompanyIndustryGroup.objects.create(company=company, industry=industry)
+
+    def store(self, url, canonical_url, topics=(), **fields):
+        article = Article.objects.create(group=self.group, title=fields.pop('title', "Acme news"), url=url,
+                                         canonical_url=canonical_url, summary="Summary", **fields)
+        MainTopic.objects.bulk_create([MainTopic(article=article, topic=topic) for topic in topics])
+        return article
+
+    def news(self, url, topics=(), **fields):
+        return {'title': "Acme news", 'url': url, 'author': '', 'publication_date': '', 'summary': "Summary",
+                'main_topics': list(topics), **fields}
+
+    def save(self, final_news):
+        save_final_news(final_news, "Acme", "https://acme.com", "Fintech")
+
+    def topics_of(self, article):
+        return list(MainTopic.objects.filter(article=article).order_by('pk').values_list('topic', flat=True))
+
+    def test_unchanged_articles_keep_their_rows_and_topics(self):
+        article = self.store("https://acme.com/news/1", "https://acme.com/news/1", topics=["Funding", "Growth"])
+        topic_ids = list(MainTopic.objects.filter(article=article).values_list('pk', flat=True))
+
+        self.save([self.news("https://acme.com/news/1", topics=["Funding", "Growth"])])
+
+        self.assertEqual(list(Article.objects.filter(group=self.group).values_list('pk', flat=True)), [article.pk])
+        self.assertEqual(list(MainTopic.objects.filter(article=article).values_list('pk', flat=True)), topic_ids)
+
+    def test_changed_topics_are_replaced(self):
+        article = self.store("https://acme.com/news/1", "https://acme.com/news/1", topics=["Funding"])
+
+        self.save([self.news("https://acme.com/news/1", topics=["Funding", "Hiring"])])
+
+        self.assertEqual(Article.objects.get(group=self.group).pk, article.pk)
+        self.assertEqual(self.topics_of(article), ["Funding", "Hiring"])
+
+    def test_near_duplicate_under_a_new_url_takes_over_the_stored_row(self):
+        stored_fingerprint = to_hex(article_fingerprint({'title': "Acme raises", 'content': self.STORY}))
+        article = self.store("https://acme.com/news/1", "https://acme.com/news/1", topics=["Funding"],
+                             fingerprint=stored_fingerprint)
+        fingerprint = to_hex(article_fingerprint({'title': "Acme raises", 'content': self.STORY + " update"}))
+
+        self.save([self.news("https://press.example.com/acme-raises", topics=["Funding"], fingerprint=fingerprint)])
+
+        stored = Article.objects.get(group=self.group)
+        self.assertEqual(stored.pk, article.pk)
+        self.assertEqual(stored.canonical_url, "https://press.example.com/acme-raises")
+        self.assertEqual(stored.fingerprint, fingerprint)
+        self.assertEqual(self.topics_of(stored), ["Funding"])
+
+    def test_legacy_rows_without_canonical_url_are_deduplicated(self):
+        first = self.store("https://www.acme.com/news/1/", "", topics=["Funding"])
+        self.store("https://acme.com/news/1?utm_source=x", "", topics=["Funding"])
+        self.store("https://acme.com/news/old", "", topics=["Old"])
+
+        self.save([self.news("https://acme.com/news/1", topics=["Funding"])])
+
+        stored = Article.objects.get(group=self.group)
+        self.assertEqual(stored.pk, first.pk)
+        self.assertEqual(stored.canonical_url, "https://acme.com/news/1")
+        self.assertEqual(self.topics_of(stored), ["Funding"])
+        self.assertEqual(MainTopic.objects.count(), 1)
@@ -3,5 +3,9 @@ from . import views
 
 urlpatterns = [
     path('find_company_news/', views.find_company_news, name='find_company_news'), # finds new company news in the internet
-    path('get_company_news/', views.get_company_news, name='get_company_news') # fetches company news from the database
+    path('get_company_news/', views.get_company_news, name='get_company_news'), # fetches company news from the database
+    path('find_company_news_batch/', views.find_company_news_batch, name='find_company_news_batch'), # queues news searches for many companies
+    path('jobs/<uuid:job_id>/', views.news_job_status, name='news_job_status'), # progress and result of an async find_company_news
+    path('batches/<uuid:batch_id>/', views.news_batch_status, name='news_batch_status'), # per-company progress and results of a batch
+    path('metrics/', views.pipeline_metrics, name='pipeline_metrics') # connection pool, LLM cache and LLM call counters of this process
 ]
@@ -1,107 +1,60 @@
+import heapq
 import os
+from itertools import chain
+from urllib.parse import urlsplit
 from serpapi import GoogleSearch
 from datetime import datetime, timedelta
 from NewsMaintenance import get_url_slug, summarize_news, save_final_news
 from SiteCrawler import scrape_company_news, extract_full_article_text
+from FetchScheduler import FetchPool
+from DateExtraction import parse_date
+from Fingerprint import FingerprintIndex, article_fingerprint, from_hex, to_hex
+from CanonicalUrl import canonicalize_url
+from .keywords import get_keyword_scorer
+from .sources import EXCLUDED_SOURCES, get_trusted_sources, matches_source, normalize_host
 
-industry_sources = {
-    "fintech": [
-        "bankier.pl", "cashless.pl", "finextra.com", "bloomberg.com", "forrester.com", "finance.yahoo.com",
-        "fintechfutures.com", "thepaypers.com", "paymentsjournal.com", "techcrunch.com", "businessinsider.com",
-        "fintechnews.sg", "finews.asia", "thefintechtimes.com"
-    ],
-    "banking": [
-        "reuters.com", "bloomberg.com", "bankingtech.com", "thebanker.com", "americanbanker.com"
-    ],
-    "energy": [
-        "energetyka24.com", "energyvoice.com", "greentechmedia.com", "energylivenews.com", "power-technology.com",
-        "oilprice.com", "renewableenergyworld.com", "cleantechnica.com", "energycentral.com"
-    ],
-    "logistics": [
-        "logistyka.rp.pl", "trans.info", "supplychaindigital.com", "freightwaves.com", "theloadstar.com",
-        "logisticsmanager.com", "supplychainquarterly.com", "supplychaintoday.com"
-    ],
-    "ecommerce": [
-        "emarketer.com", "retaildive.com", "practicalecommerce.com", "ecommercebytes.com", "internetretailing.net",
-        "ecommerce-news.eu", "businessinsider.com", "techcrunch.com"
-    ],
-    "cybersecurity": [
-        "cyberscoop.com", "threatpost.com", "krebsonsecurity.com", "darkreading.com", "infosecurity-magazine.com",
-        "securityweek.com", "thehackernews.com", "zdnet.com"
-    ],
-    "telecommunications": [
-        "lightreading.com", "telecoms.com", "totaltele.com", "fiercetelecom.com", "rcrwireless.com"
-    ],
-    "healthcare": [
-        "healthcareitnews.com", "medgadget.com", "mobihealthnews.com", "medicalnewstoday.com", "healthline.com",
-        "healthcarefinancenews.com"
-    ],
-    "automotive": [
-        "autonews.com", "automotiveworld.com", "caranddriver.com", "motortrend.com", "autoexpress.co.uk"
-    ],
-    "technology": [
-        "techcrunch.com", "wired.com", "thenextweb.com", "venturebeat.com", "theverge.com", "zdnet.com",
-        "cnet.com", "gizmodo.com", "mashable.com", "engadget.com"
-    ],
-    "real_estate": [
-        "therealdeal.com", "housingwire.com", "inman.com", "bloomberg.com", "propertywire.com"
-    ]
-}
-
-excluded_sources = [
-    "ft.com"
-]
-
-def filter_recent_news(news_list, max_age_days=730):
+TOP_NEWS = 9  # Articles summarized per search
+
+def iter_recent_news(news_list, max_age_days=730, stats=None):
     cutoff = datetime.utcnow() - timedelta(days=max_age_days)
-    filtered = []
     for n in news_list:
-        try:
-            raw_date = n.get("date", "")
-            parsed_date = datetime.strptime(raw_date.split(",")[0], "%m/%d/%Y")
-            if parsed_date > cutoff:
-                n["parsed_date"] = parsed_date
-                filtered.append(n)
-        except Exception as e:
-            print(f"Could not parse the date: {n.get('title')} → {e}")
+        parsed_date = n.get("parsed_date") or parse_date(n.get("date", ""))
+        if not parsed_date:
+            print(f"Could not parse the date: {n.get('title')} → {n.get('date')}")
+        elif parsed_date > cutoff:
+            n["parsed_date"] = parsed_date
+            yield n
             continue
-    return filtered
-
-def deduplicate_by_link(news_list):
-    if not news_list:
-        return []
+        _count(stats, "too_old_or_undated")
 
+def iter_unique_by_link(news_list, stats=None):
+    # Links are compared in canonical form, so tracking parameters, "www." or a trailing slash don't count
+    # Candidates whose link is not an absolute web URL (relative, mailto:, unparsable) are skipped
     seen_links = set()
-    unique_news = []
-
     for news in news_list:
-        link = news.get('link', '').strip()
+        try:
+            link = canonicalize_url(news.get('link') or '')
+            host = urlsplit(link).hostname or ''
+        except Exception as e:
+            print(f"[WARN] Could not canonicalize the link {news.get('link')!r}: {e}")
+            host = ''
 
-        if link and link not in seen_links:
+        if '.' not in host:
+            _count(stats, "bad_link")
+        elif link not in seen_links:
             seen_links.add(link)
-            unique_news.append(news)
-
-    return unique_news
+            news["canonical_url"] = link
+            yield news
+        else:
+            _count(stats, "duplicates")
 
 def industry_filter(news_list, target_industry, threshold=0.10):
-    industry_keywords = {
-        "technology": ["tech", "software", "AI", "artificial intelligence", "startup", "digital", "app", "platform", "technology"],
-        "finance": ["bank", "investment", "finance", "fintech", "crypto", "blockchain", "trading", "money"],
-        "healthcare": ["health", "medical", "hospital", "pharma", "medicine", "treatment", "patient", "healthcare"],
-        "energy": ["energy", "oil", "renewable", "solar", "wind", "electric", "battery", "power"],
-        "fintech": ["tech", "software", "AI", "artificial intelligence", "startup", "digital", "app", "platform", "technology", "bank", "investment", "finance", "fintech", "crypto", "blockchain", "trading", "money", "cloud"],
-        "banking": ["bank", "investment", "finance", "fintech", "crypto", "blockchain", "trading", "money"]
-    }
-
-    keywords = industry_keywords.get(target_industry.lower(), [target_industry.lower()])
+    scorer = get_keyword_scorer(target_industry)
     result_news = []
 
     for n in news_list:
-        text = (n.get("title", "") + " " + n.get("content", "")[:300]).lower()
-
-        # Counting keywords matches
-        matches = sum(1 for keyword in keywords if keyword in text)
-        score = min(matches / len(keywords), 1.0)  # Normalize to 0-1
+        text = n.get("title", "") + " " + n.get("content", "")[:300]
+        score = scorer.score(text)
 
         # if score >= threshold:
         #     n["industry_score"] = score
@@ -112,70 +65,203 @@ def industry_filter(news_list, target_industry, threshold=0.10):
 
     return result_news
 
-def check_if_company_related(news_list, company_name):
-    result_news = []
-    for n in news_list:
-        if 'link' in n:
-            text = extract_full_article_text(n['link'])
-            title = n['title']
-            if company_name in title or company_name in text:
-                n["content"] = text
-                result_news.append(n)
-    return result_news
+def is_company_related(news, company_name, text):
+    return company_name in news['title'] or company_name in text
 
-def filter_by_known_sources(news_list, target_industry, source_database):
-    trusted_sources = source_database.get(target_industry, [])
-    result_news = []
-    result_news_known_sources = []
+def _source_priority(news, trusted_sources):
+    # Returns "trusted", "excluded" or None by the host of the link, trusted sources first.
+    host = normalize_host(news.get("link", ""))
+    if matches_source(host, trusted_sources):
+        return "trusted"
+    if matches_source(host, EXCLUDED_SOURCES):
+        return "excluded"
+    return None
+
+def iter_source_priority(news_list, target_industry, stats=None):
+    # Drops excluded sources and flags trusted ones with the top score.
+    trusted_sources = get_trusted_sources(target_industry)
     for n in news_list:
-        link = n.get("link", "").lower()
-        if any(trusted_source.lower() in link for trusted_source in trusted_sources):
+        priority = _source_priority(n, trusted_sources)
+        if priority == "trusted":
             n["industry_score"] = 1.0  # Setting the highest possible score
-            result_news_known_sources.append(n)
-        elif any(excluded_source.lower() in link for excluded_source in excluded_sources):
+            n["trusted_source"] = True
+            yield n
+        elif priority == "excluded":
+            _count(stats, "excluded_source")
+        else:
+            yield n
+
+def _count(stats, name, value=1):
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + value
+
+def _score_upper_bound(news):
+    # Best rank a candidate can still reach before its page is downloaded. Unless it comes from a
+    # trusted source or the crawl state, the industry score depends on the content, so only the date is sure.
+    return news.get("industry_score", 1.0), news["parsed_date"]
+
+def _needs_content(news, company_name):
+    if news.get("content") is not None or news.get("recalled"):
+        return False
+    # A trusted source naming the company in its title is decided without its content
+    return not (news.get("trusted_source") and company_name in news.get("title", ""))
+
+def _recall(candidates, crawl_state, stats=None):
+    # Candidates read by a recent refresh take their earlier verdict instead of a new download
+    for news in candidates:
+        seen = crawl_state.recall(news["link"]) if news.get("content") is None else None
+        if seen is None:
+            yield news
             continue
+        _count(stats, "recalled")
+        if not seen.company_related:
+            crawl_state.record(news, company_related=False)
+            _count(stats, "not_company_related")
+            continue
+        news["recalled"] = True
+        news["content_hash"] = seen.content_hash
+        if seen.fingerprint:
+            news["fingerprint"] = seen.fingerprint
+        if seen.industry_score is not None and not news.get("trusted_source"):
+            news["industry_score"] = seen.industry_score
+        yield news
+
+def select_top_news(candidates, user_industry, searched_company, limit=TOP_NEWS, stats=None, crawl_state=None):
+    """
+    Picks the `limit` best candidates by (industry score, date). Candidates are visited in order
+    of their best possible rank and page content is only downloaded while a candidate can still
+    beat the current top `limit`, kept in a bounded min-heap. With a `crawl_state`, articles read
+    by a recent refresh are not downloaded again and every verdict is recorded in it.
+    """
+    if crawl_state is not None:
+        candidates = _recall(candidates, crawl_state, stats)
+    pending = sorted(candidates, key=_score_upper_bound, reverse=True)
+    top = []  # (key, sequence, news) min-heap
+    sequence = 0
+
+    fingerprints = FingerprintIndex()  # Near-duplicate lookup over the articles in `top`
+
+    def accept(news):
+        nonlocal sequence
+        if "industry_score" not in news:
+            industry_filter([news], user_industry)
+        key = (news.get("industry_score", 0), news["parsed_date"])
+        sequence -= 1  # Earlier candidates win ties, as in a stable sort
+        entry = (key, sequence, news)
+
+        fingerprint = from_hex(news["fingerprint"]) if news.get("fingerprint") else article_fingerprint(news)
+        if fingerprint is not None:
+            news["fingerprint"] = to_hex(fingerprint)
+        if crawl_state is not None:
+            crawl_state.record(news, company_related=True, content=news.get("content"))
+
+        # A republished copy of an article already selected keeps only the better-ranked of the two
+        if fingerprint is not None:
+            duplicates = set(fingerprints.query(fingerprint))
+            if duplicates:
+                if any(e[:2] > entry[:2] for e in top if e[1] in duplicates):
+                    _count(stats, "near_duplicates")
+                    return
+                _count(stats, "near_duplicates", len(duplicates))
+                top[:] = [e for e in top if e[1] not in duplicates]
+                heapq.heapify(top)
+                for duplicate in duplicates:
+                    fingerprints.remove(duplicate)
+
+        if len(top) < limit:
+            heapq.heappush(top, entry)
+        elif entry > top[0]:
+            evicted = heapq.heapreplace(top, entry)
+            fingerprints.remove(evicted[1])
         else:
-            result_news.append(n)
-    return result_news_known_sources, result_news
+            return
+        if fingerprint is not None:
+            fingerprints.add(sequence, fingerprint)
+
+    def can_still_qualify(news):
+        return len(top) < limit or _score_upper_bound(news) > top[0][0]
+
+    # Rolling fetches: the next candidate starts as soon as a slot frees up, and whether it can still
+    # make the top is re-checked against the heap after every completed fetch
+    i = 0
+    with FetchPool(extract_full_article_text) as pool:
+        while True:
+            while i < len(pending) and pool.has_free_slot() and can_still_qualify(pending[i]):
+                news = pending[i]
+                i += 1
+                if _needs_content(news, searched_company):
+                    pool.submit(news, news['link'])
+                    _count(stats, "fetched")
+                else:
+                    accept(news)
+            if not pool.in_flight:
+                break
+
+            news, text, error = pool.next_completed()
+            if error is not None:
+                _count(stats, "fetch_failed")
+                continue
+            if not is_company_related(news, searched_company, text):
+                if crawl_state is not None:
+                    crawl_state.record(news, company_related=False, content=text)
+                _count(stats, "not_company_related")
+                continue
+            news["content"] = text
+            accept(news)
+
+    _count(stats, "fetches_avoided", sum(1 for n in pending[i:] if _needs_content(n, searched_company)))
+    _count(stats, "not_ranked", len(pending) - i)
 
-def get_news(base_url, user_industry, searched_company):
+    return [news for _, _, news in sorted(top, reverse=True)]
+
+def select_best_news(base_url, user_industry, searched_company, progress=None, crawl_state=None):
+    # `progress(stage, percent)` is called as the pipeline advances, e.g. to update a NewsJob.
+    # `crawl_state` (see CrawlState.py) lets a refresh skip the pages read by the previous ones.
+    report = progress or (lambda stage, percent: None)
+
+    report("Scraping the company website", 5)
+    skip_fetch = crawl_state.recall if crawl_state is not None else None
+    news_articles = scrape_company_news(base_url, searched_company, max_articles=15, skip_fetch=skip_fetch)
+
+    report("Searching for news with SerpAPI", 35)
+    print("Searching for news with SERPAPI...")
+    params = {
+        "engine": "google_news",
+        "q": searched_company,
+        "api_key": os.getenv("SERPAPI_KEY")
+    }
+    search = GoogleSearch(params)
+    results = search.get_dict()
+
+    # Pipeline execution
+    news_results = results["news_results"]  # News from Serp API
+    print(f"{len(news_results)} news found")
+    print("Processing...")
+    report("Filtering news", 45)
+
+    stats = {"serpapi": len(news_results), "company_site": len(news_articles)}
+
+    # Cheap metadata filters run lazily first; page downloads happen only in select_top_news
+    candidates = chain(news_results, news_articles)
+    candidates = iter_recent_news(candidates, stats=stats)  # Date filtering
+    candidates = iter_unique_by_link(candidates, stats=stats)  # URL deduplication
+    candidates = iter_source_priority(candidates, user_industry, stats=stats)  # Industry source priority
+
+    best_news = select_top_news(candidates, user_industry, searched_company, stats=stats, crawl_state=crawl_state)
+    stats["selected"] = len(best_news)
+    print(f"[INFO] Pipeline stages: {stats}")
+
+    return best_news
+
+def get_news(base_url, user_industry, searched_company, progress=None, crawl_state=None):
+    report = progress or (lambda stage, percent: None)
     try:
-        news_articles = scrape_company_news(base_url, searched_company, max_articles=15)
-
-        print("Searching for news with SERPAPI...")
-        params = {
-            "engine": "google_news",
-            "q": searched_company,
-            "api_key": os.getenv("SERPAPI_KEY")
-        }
-        search = GoogleSearch(params)
-        results = search.get_dict()
-
-        # Pipeline execution
-        news_results = results["news_results"]  # News from Serp API
-        print(f"{len(news_results)} news found")
-        print("Processing...")
-
-        company_related_news = check_if_company_related(news_results,
-                                                        searched_company)  # Company related news filtering
-        company_related_news += news_articles
-        recent_news = filter_recent_news(company_related_news)  # Date filtering
-        deduplicated_news = deduplicate_by_link(recent_news)  # URL and title deduplication
-        industry_news_known_sources, industry_news_not_known_sources = filter_by_known_sources(deduplicated_news,
-                                                                                               user_industry,
-                                                                                               industry_sources)  # Setting priority for industry related sources
-        industry_news = industry_filter(industry_news_not_known_sources, user_industry)  # Industry filtering
-        industry_news += industry_news_known_sources
-
-        sorted_news = sorted(
-            industry_news,
-            key=lambda n: (n.get('industry_score', 0), n.get('parsed_date', datetime.min)),
-            reverse=True
-        )
-
-        best_news = sorted_news[:9]
-
-        final_news = summarize_news(best_news, searched_company)
+        best_news = select_best_news(base_url, user_industry, searched_company, progress=progress,
+                                     crawl_state=crawl_state)
+
+        report("Summarizing news", 70)
+        reuse = crawl_state.reusable_summary if crawl_state is not None else None
+        final_news = summarize_news(best_news, searched_company, reuse=reuse)
 
         # save_final_news(final_news, searched_company, base_url, user_industry)
 
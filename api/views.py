@@ -1,11 +1,23 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, parse_etags, quote_etag
 from django.utils.timezone import localtime
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from company_news.models import Company, Industry, CompanyIndustryGroup, Article
-from .serializers import NewsSerializer, ArticleSerializer
-from .utils import get_news
+from company_news.models import Company, Industry, CompanyIndustryGroup, Article, NewsJob, NewsBatch
+from NewsMaintenance import articles_cache_key
+from .serializers import ArticleSerializer
+from .streaming import stream_news, STREAM_FORMATS
+from .jobs import (submit_job, serialize_job, run_news_search, request_refresh, submit_batch, serialize_batch,
+                   collect_metrics)
 
 @api_view(['POST'])
 def find_company_news(request):
@@ -16,11 +28,82 @@ def find_company_news(request):
     if not company_name or not company_website or not searched_industry:
         return Response({"error": "Missing parameters"}, status=400)
 
-    final_news = get_news(company_website, searched_industry, company_name)
+    stream_format = requested_stream_format(request)
+    if stream_format:
+        response = StreamingHttpResponse(
+            stream_news(company_website, searched_industry, company_name, stream_format),
+            content_type=STREAM_FORMATS[stream_format],
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Keeps reverse proxies from buffering the events
+        return response
+
+    if str(request.data.get('Async', '')).lower() in ('true', '1'):
+        job = submit_job(company_name, company_website, searched_industry)
+        return Response({
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': reverse('news_job_status', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    job = run_news_search(company_name, company_website, searched_industry)
+    if job.status == 'failed':
+        return Response(serialize_job(job), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if job.status != 'done':  # Still running after NEWS_JOB_WAIT_TIMEOUT, the client can poll the job
+        return Response(serialize_job(job), status=status.HTTP_202_ACCEPTED)
+
+    return Response(job.result)
+
+def requested_stream_format(request):
+    # "Stream": "ndjson" | "sse" in the body. Not read from Accept, which DRF's negotiation would reject.
+    stream_format = str(request.data.get('Stream', '')).lower()
+    return stream_format if stream_format in STREAM_FORMATS else None
+
+BATCH_MAX_COMPANIES = 500
+
+@api_view(['POST'])
+def find_company_news_batch(request):
+    companies = request.data.get('Companies')
+    if not isinstance(companies, list) or not companies:
+        return Response({"error": "Missing parameters"}, status=400)
+    if len(companies) > BATCH_MAX_COMPANIES:
+        return Response({"error": f"At most {BATCH_MAX_COMPANIES} companies per batch"}, status=400)
 
-    serializer = NewsSerializer(final_news, many=True)
+    for c in companies:
+        if not isinstance(c, dict) or not all(c.get(k) for k in ('CompanyName', 'CompanyWebsite', 'SearchedIndustry')):
+            return Response({"error": "Missing parameters", "company": c}, status=400)
 
-    return Response(serializer.data)
+    save_results = str(request.data.get('Save', '')).lower() in ('true', '1')
+    batch, jobs = submit_batch(companies, save_results=save_results)
+
+    return Response({
+        'batch_id': str(batch.id),
+        'job_ids': [str(job.id) for job in jobs],
+        'status_url': reverse('news_batch_status', args=[batch.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+def news_batch_status(request, batch_id):
+    try:
+        batch = NewsBatch.objects.get(id=batch_id)
+    except NewsBatch.DoesNotExist:
+        return Response({'error': 'Batch not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    include_articles = request.GET.get('IncludeArticles', '').lower() in ('true', '1')
+    return Response(serialize_batch(batch, include_articles=include_articles))
+
+@api_view(['GET'])
+def news_job_status(request, job_id):
+    try:
+        job = NewsJob.objects.get(id=job_id)
+    except NewsJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(serialize_job(job))
+
+@api_view(['GET'])
+def pipeline_metrics(request):
+    return Response(collect_metrics())
 
 @api_view(['GET'])
 def get_company_news(request):
@@ -30,23 +113,98 @@ def get_company_news(request):
     if not company_name or not industry_name:
         return Response({'error': 'Missing parameters'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        company = Company.objects.get(name__iexact=company_name)
-        industry = Industry.objects.get(name__iexact=industry_name)
-        group = CompanyIndustryGroup.objects.get(company=company, industry=industry)
-    except Company.DoesNotExist:
-        return Response({'error': 'Company not found'}, status=status.HTTP_404_NOT_FOUND)
-    except Industry.DoesNotExist:
-        return Response({'error': 'Industry not found'}, status=status.HTTP_404_NOT_FOUND)
-    except CompanyIndustryGroup.DoesNotExist:
-        return Response([], status=status.HTTP_200_OK)
-
-    articles = Article.objects.filter(group=group).order_by('-publication_date')[:9]
-    serializer = ArticleSerializer(articles, many=True)
+    # One joined query on the happy path; the lookups below only run to explain a miss
+    group = CompanyIndustryGroup.objects.select_related('company', 'industry').filter(
+        company__name__lower=company_name.lower(),
+        industry__name__lower=industry_name.lower(),
+    ).first()
+
+    if group is None:
+        company = Company.objects.filter(name__lower=company_name.lower()).first()
+        if company is None:
+            return Response({'error': 'Company not found'}, status=status.HTTP_404_NOT_FOUND)
+        industry = Industry.objects.filter(name__lower=industry_name.lower()).first()
+        if industry is None:
+            return Response({'error': 'Industry not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Nothing stored yet: start one refresh and let the client poll it
+        job_id = request_refresh(company, industry)
+        return Response({
+            'articles': [],
+            'last_updated': None,
+            'freshness': freshness_info('missing', None, job_id),
+        }, status=status.HTTP_200_OK)
+
+    company, industry = group.company, group.industry
+    age = (timezone.now() - group.last_updated).total_seconds() if group.last_updated else None
+    job_id = None
+    if age is None or age > settings.NEWS_FRESH_FOR_SECONDS:
+        state = 'stale'
+        job_id = request_refresh(company, industry)  # Served now, refreshed in the background
+    else:
+        state = 'fresh'
 
     last_updated_iso = localtime(group.last_updated).isoformat() if group.last_updated else None
+    cached = get_cached_articles(group)
+    # Weak: the articles match the validator byte for byte, but the freshness block (age, refresh job)
+    # changes between responses, so a 304 only promises an equivalent body
+    etag = 'W/' + quote_etag(cached['etag'])
 
-    return Response({
-        'articles': serializer.data,
-        'last_updated': last_updated_iso
-    })
\ No newline at end of file
+    headers = {'ETag': etag}
+    if group.last_updated:
+        headers['Last-Modified'] = http_date(group.last_updated.timestamp())
+    max_age = 0 if state == 'stale' else min(settings.NEWS_HTTP_MAX_AGE,
+                                             settings.NEWS_FRESH_FOR_SECONDS - int(age or 0))
+
+    if not_modified(request, etag, group.last_updated):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    else:
+        response = Response({
+            'articles': cached['articles'],
+            'last_updated': last_updated_iso,
+            'freshness': freshness_info(state, age, job_id),
+        }, headers=headers)
+    patch_cache_control(response, private=True, max_age=max_age)
+    return response
+
+def get_cached_articles(group):
+    # Serialized articles and their ETag, cached per group until save_final_news replaces them
+    key = articles_cache_key(group.pk)
+    version = group.last_updated.isoformat() if group.last_updated else ''
+    cached = cache.get(key)
+    if cached and cached['version'] == version:
+        return cached
+
+    articles = list(Article.objects.filter(group=group)
+                    .order_by('-publication_date')
+                    .prefetch_related('maintopic_set')[:9])
+    serialized = list(ArticleSerializer(articles, many=True).data)
+    fingerprint = f"{group.pk}|{version}|" + ",".join(str(a.pk) for a in articles)
+
+    cached = {
+        'version': version,
+        'etag': hashlib.sha1(fingerprint.encode('utf-8')).hexdigest(),
+        'articles': serialized,
+    }
+    cache.set(key, cached, settings.NEWS_RESPONSE_CACHE_TIMEOUT)
+    return cached
+
+def not_modified(request, etag, last_updated):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        # Weak comparison (RFC 9110, 13.1.2): validators match whether or not they carry W/
+        opaque = etag.removeprefix('W/')
+        return if_none_match.strip() == '*' or any(tag.removeprefix('W/') == opaque
+                                                   for tag in parse_etags(if_none_match))
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(if_modified_since and last_updated and int(last_updated.timestamp()) <= if_modified_since)
+
+def freshness_info(state, age, job_id):
+    return {
+        'state': state,
+        'age_seconds': int(age) if age is not None else None,
+        'fresh_for_seconds': settings.NEWS_FRESH_FOR_SECONDS,
+        'refresh_job_id': str(job_id) if job_id else None,
+        'refresh_status_url': reverse('news_job_status', args=[job_id]) if job_id else None,
+    }
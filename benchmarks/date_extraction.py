@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of the news-listing date extraction.
+
+Compares the former per-call pattern list + dateutil fallback with DateExtraction.extract_date
+over snippets shaped like the ancestor texts of real news listings.
+
+    python benchmarks/date_extraction.py [rounds]
+"""
+import os
+import re
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dateutil.parser import parse
+
+from DateExtraction import extract_date
+
+SNIPPETS = [
+    "Press release\n2025-05-08\nAcme Corp completes acquisition of Widget Ltd to expand its payments platform",
+    "News | 08/05/2025 | Acme announces strategic partnership with Northwind Bank",
+    "Acme Group reports Q1 2025 results\nRevenue up 12% year over year\n8 May 2025\nRead more",
+    "May 8, 2025 — Acme opens new data centre in Frankfurt to serve European customers. Read more",
+    "Aktualności\n08.05.2025\nAcme S.A. podpisała umowę z operatorem sieci przesyłowej",
+    "8th May\nAcme named a leader in the 2025 Forrester Wave for cloud banking platforms",
+    "2025.05.08 Acme Korea launches mobile wallet",
+    "Tuesday, 3 June, 2025\nAcme appoints Jane Doe as Chief Technology Officer\nShare on LinkedIn",
+    "Acme welcomes 12 new partners to its marketplace ecosystem. Learn more about our partner programme",
+    "All news\nPress releases\nEvents\nMedia contacts\nSubscribe to our newsletter to receive the latest updates",
+    "Sept. 3, 2024 · 4 min read · Acme and Contoso extend their collaboration on open banking APIs",
+    "Insights | 14 of March 2024 | How real-time payments are changing treasury management",
+] * 5
+
+LEGACY_PATTERNS = [
+    (r"\d{4}-\d{2}-\d{2}", 1),
+    (r"\d{2}/\d{2}/\d{4}", 2),
+    (r"\d{1,2}\s+\w+\s+\d{4}", 3),
+    (r"\w+\s+\d{1,2},\s+\d{4}", 4),
+    (r"\d{1,2}\.\d{1,2}\.\d{4}", 5),
+    (r"\d{1,2}(st|nd|rd|th)?\s+[A-Za-z]{3,}", 6),
+    (r"\d{4}\.\d{2}\.\d{2}", 7)
+]
+
+
+def legacy_extract(text):
+    for pattern, fmt in LEGACY_PATTERNS:
+        match = re.search(pattern, text)
+        if match:
+            if fmt == 6:
+                match = re.sub(r"(st|nd|rd|th)", "", match.group(0)) + " " + str(datetime.now().year)
+            else:
+                match = match.group(0)
+            try:
+                return parse(match)
+            except Exception:
+                return None
+    return None
+
+
+def run_legacy():
+    return [legacy_extract(s) for s in SNIPPETS]
+
+
+def run_compiled():
+    year = datetime.now().year
+    return [extract_date(s, year) for s in SNIPPETS]
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for name, fn in (("legacy (re.search + dateutil)", run_legacy), ("compiled (DateExtraction)", run_compiled)):
+        seconds = min(timeit.repeat(fn, number=rounds, repeat=3))
+        per_snippet = seconds / (rounds * len(SNIPPETS)) * 1e6
+        found = sum(1 for d in fn() if d)
+        print(f"{name:32} {per_snippet:8.2f} µs/snippet, {found}/{len(SNIPPETS)} dated")
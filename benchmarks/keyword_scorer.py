@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of industry keyword scoring as keyword lists grow.
+
+Compares the former one-`in`-scan-per-keyword loop with api.keywords.KeywordScorer, which
+matches all keywords of an industry with one compiled regex, over synthetic articles shaped like
+the title + first 300 characters that industry_filter scores.
+
+    python benchmarks/keyword_scorer.py [keywords] [articles]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "company_news.settings")
+django.setup()
+
+from api.keywords import KeywordScorer
+
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+
+def make_keywords(rng, count):
+    keywords = set()
+    while len(keywords) < count:
+        words = [random_word(rng) for _ in range(rng.choice((1, 1, 1, 2)))]
+        keywords.add(" ".join(words))
+    return sorted(keywords)
+
+
+def make_articles(rng, keywords, count):
+    # Mostly filler words with a few keywords mixed in, cut like industry_filter does
+    articles = []
+    for _ in range(count):
+        words = [random_word(rng) for _ in range(60)]
+        for _ in range(rng.randint(0, 5)):
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        text = " ".join(words)
+        articles.append(text[:80] + " " + text[80:380])
+    return articles
+
+
+def legacy_score(keywords, text):
+    text = text.lower()
+    matches = sum(1 for keyword in keywords if keyword in text)
+    return min(matches / len(keywords), 1.0)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+if __name__ == "__main__":
+    keyword_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    article_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    rng = random.Random(42)
+    keywords = make_keywords(rng, keyword_count)
+    articles = make_articles(rng, keywords, article_count)
+
+    compile_seconds, scorer = timed(lambda: KeywordScorer(keywords))
+    legacy_seconds, legacy = timed(lambda: [legacy_score(keywords, a) for a in articles])
+    compiled_seconds, compiled = timed(lambda: [scorer.score(a) for a in articles])
+
+    print(f"{keyword_count} keywords, {article_count} articles")
+    print(f"{'compile (KeywordScorer)':32} {compile_seconds * 1000:10.1f} ms")
+    for name, seconds, scores in (("legacy (`in` per keyword)", legacy_seconds, legacy),
+                                  ("compiled (KeywordScorer)", compiled_seconds, compiled)):
+        per_article = seconds / article_count * 1e6
+        matched = sum(1 for s in scores if s)
+        print(f"{name:32} {per_article:10.2f} µs/article, {matched}/{article_count} matched")
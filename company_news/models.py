@@ -1,12 +1,25 @@
+import uuid
+
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+# Enables `name__lower=...` lookups, which can use the Lower(name) indexes below
+models.CharField.register_lookup(Lower)
 
 class Company(models.Model):
     name = models.CharField(max_length=255)
     website = models.URLField()
 
+    class Meta:
+        indexes = [models.Index(Lower('name'), name='company_name_lower_idx')]
+
 class Industry(models.Model):
     name = models.CharField(max_length=55)
 
+    class Meta:
+        indexes = [models.Index(Lower('name'), name='industry_name_lower_idx')]
+
 class IndustrySources(models.Model):
     industry = models.ForeignKey(Industry, on_delete=models.CASCADE)
     source = models.CharField(max_length=255)
@@ -27,10 +40,71 @@ class Article(models.Model):
     group = models.ForeignKey(CompanyIndustryGroup, on_delete=models.CASCADE)
     title = models.CharField(max_length=500)
     url = models.URLField()
+    canonical_url = models.CharField(max_length=1000, blank=True, db_index=True)
     author = models.CharField(max_length=255, blank=True)
     publication_date = models.DateField(null=True, blank=True)
     summary = models.TextField()
+    fingerprint = models.CharField(max_length=512, blank=True)  # MinHash of title and content, see Fingerprint.py
+
+    class Meta:
+        indexes = [models.Index(fields=['group', '-publication_date'], name='article_group_pubdate_idx')]
 
 class MainTopic(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE)
     topic = models.TextField()
+
+class SeenArticle(models.Model):
+    # Crawl state of a group: every candidate article a refresh looked at, see CrawlState.py
+    group = models.ForeignKey(CompanyIndustryGroup, on_delete=models.CASCADE)
+    canonical_url = models.CharField(max_length=1000)
+    content_hash = models.CharField(max_length=64, blank=True)
+    company_related = models.BooleanField(default=True)
+    industry_score = models.FloatField(null=True, blank=True)
+    fingerprint = models.CharField(max_length=512, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+    last_fetched = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('group', 'canonical_url')
+
+class LLMCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    prompt_name = models.CharField(max_length=255, blank=True)
+    prompt_version = models.CharField(max_length=55, blank=True)
+    model = models.CharField(max_length=55)
+    output_text = models.TextField()
+    total_tokens = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+class NewsJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company_name = models.CharField(max_length=255)
+    company_website = models.URLField()
+    searched_industry = models.CharField(max_length=55)
+    coalesce_key = models.CharField(max_length=64, db_index=True, blank=True)
+    save_results = models.BooleanField(default=False)  # Store the articles via save_final_news when done
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=255, blank=True)
+    progress = models.IntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Bumped while the owning process is alive, see api/jobs.py; a stale one marks an orphaned job
+    heartbeat_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+class NewsBatch(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    jobs = models.ManyToManyField(NewsJob, related_name='batches')  # Shared jobs when a company was already running
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -127,6 +127,25 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'company-news'),
+    }
+}
+
+NEWS_RESPONSE_CACHE_TIMEOUT = int(os.getenv('NEWS_RESPONSE_CACHE_TIMEOUT', '3600'))  # Serialized articles per group
+NEWS_HTTP_MAX_AGE = int(os.getenv('NEWS_HTTP_MAX_AGE', '60'))  # Cache-Control max-age of get_company_news
+
+# Freshness of stored news served by get_company_news
+# Older data is still served, but a background refresh is queued
+
+NEWS_FRESH_FOR_SECONDS = int(os.getenv('NEWS_FRESH_FOR_SECONDS', str(24 * 3600)))
+NEWS_REFRESH_COOLDOWN_SECONDS = int(os.getenv('NEWS_REFRESH_COOLDOWN_SECONDS', str(15 * 60)))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 